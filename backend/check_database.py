@@ -1,34 +1,293 @@
 #!/usr/bin/env python3
+"""Admin and reporting CLI for the Amplify database.
+
+Every report streams its cursor in batches and writes rows as they
+arrive, so memory stays flat however many creators and tips there are.
+
+    python check_database.py                      # list creators
+    python check_database.py creators --youtube-only --format csv -o creators.csv
+    python check_database.py orphans              # tips, hot or archived, whose channel is not registered
+    python check_database.py reconcile [--fix]    # compare running totals with db.tips
+    python check_database.py top --window week --limit 20 --supporters 5
+    python check_database.py summary              # collection counts and tip totals, archive included
+"""
+import argparse
 import asyncio
+import csv
 import os
-from motor.motor_asyncio import AsyncIOMotorClient
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import orjson
 from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+
+import tip_stats
+from tip_archive import get_archived_totals
+
+# Never print OAuth tokens
+CREATOR_FIELDS = [
+    "youtubeChannelId", "youtubeChannelName", "channelId", "walletAddress",
+    "defaultTipAmount", "youtubeConnected", "registeredAt",
+]
+
+CREATOR_LABELS = {
+    "youtubeChannelId": "YouTube Channel ID",
+    "youtubeChannelName": "YouTube Channel Name",
+    "channelId": "Legacy Channel ID",
+    "walletAddress": "Wallet Address",
+    "defaultTipAmount": "Default Tip Amount",
+}
+
+
+class ReportWriter:
+    """Writes report rows one at a time as text, a JSON array, NDJSON or CSV"""
+
+    def __init__(self, fmt: str, output: Optional[str], fields: List[str], heading: Optional[str] = None, labels: Optional[Dict[str, str]] = None):
+        self.fmt = fmt
+        self.fields = fields
+        self.heading = heading
+        self.labels = labels or {}
+        self.stream = open(output, "w", newline="") if output else sys.stdout
+        self.rows = 0
+        self._csv = csv.DictWriter(self.stream, fieldnames=fields, extrasaction="ignore") if fmt == "csv" else None
+        if self._csv:
+            self._csv.writeheader()
+        elif fmt == "json":
+            self.stream.write("[")
+
+    def write(self, row: Dict[str, Any]):
+        if self.fmt == "text":
+            self.stream.write(f"\n{self.heading}\n" if self.heading else ("\n" if self.rows else ""))
+            for field in self.fields:
+                label = self.labels.get(field, field)
+                value = row.get(field)
+                self.stream.write(f"   {label}: {'Not set' if value is None else value}\n")
+        elif self._csv:
+            self._csv.writerow({
+                field: value.isoformat() if isinstance(value, datetime) else value
+                for field, value in row.items()
+            })
+        else:
+            encoded = orjson.dumps(row, option=orjson.OPT_NON_STR_KEYS).decode()
+            if self.fmt == "json":
+                self.stream.write(("," if self.rows else "") + "\n  " + encoded)
+            else:
+                self.stream.write(encoded + "\n")
+        self.rows += 1
 
-async def check_database():
-    load_dotenv()
-    
-    mongo_url = os.environ['MONGO_URL']
-    db_name = os.environ['DB_NAME']
-    
-    client = AsyncIOMotorClient(mongo_url)
-    db = client[db_name]
-    
-    print("🔍 Checking registered creators...")
-    
-    creators = await db.creators.find({}).to_list(100)
-    
-    if not creators:
+    def close(self):
+        if self.fmt == "json":
+            self.stream.write("\n]\n" if self.rows else "]\n")
+        self.stream.flush()
+        if self.stream is not sys.stdout:
+            self.stream.close()
+
+
+async def write_rows(rows: AsyncIterator[Dict[str, Any]], args, fields: List[str], **text_options) -> int:
+    writer = ReportWriter(args.format, args.output, fields, **text_options)
+    try:
+        async for row in rows:
+            writer.write(row)
+    finally:
+        writer.close()
+    if args.format == "text" or args.output:
+        print(f"{writer.rows} row(s)", file=sys.stderr)
+    return writer.rows
+
+
+async def list_creators(db, args) -> int:
+    """Stream every creator, optionally only those with YouTube connected"""
+    query = {"youtubeConnected": True} if args.youtube_only else {}
+    projection = {"_id": 0, **{field: 1 for field in CREATOR_FIELDS}}
+    cursor = db.creators.find(query, projection).sort("_id", 1).batch_size(args.batch_size)
+    rows = await write_rows(cursor, args, CREATOR_FIELDS, heading="✅ Found creator:", labels=CREATOR_LABELS)
+    if not rows and args.format == "text":
         print("❌ No creators found in database")
-    else:
-        for creator in creators:
-            print(f"\n✅ Found creator:")
-            print(f"   YouTube Channel ID: {creator.get('youtubeChannelId', 'Not set')}")
-            print(f"   YouTube Channel Name: {creator.get('youtubeChannelName', 'Not set')}")
-            print(f"   Legacy Channel ID: {creator.get('channelId', 'Not set')}")
-            print(f"   Wallet Address: {creator.get('walletAddress', 'Not set')}")
-            print(f"   Default Tip Amount: ${creator.get('defaultTipAmount', 'Not set')}")
-    
-    client.close()
+    return 0
+
+
+async def find_orphans(db, args) -> int:
+    """Report channels that have tips, hot or archived, but no registered creator"""
+    unregistered = [
+        {"$lookup": {"from": "creators", "localField": "_id", "foreignField": "channelKeys", "as": "creator"}},
+        {"$match": {"creator": {"$size": 0}}},
+    ]
+    hot_pipeline = [
+        {"$group": {
+            "_id": "$channelId",
+            "tips": {"$sum": 1},
+            "amount": {"$sum": "$amount"},
+            "lastTipAt": {"$max": "$timestamp"},
+        }},
+        *unregistered,
+    ]
+    archive_pipeline = [
+        {"$match": {"kind": "channel"}},
+        {"$project": {"_id": "$key", "tips": "$count", "amount": 1, "lastTipAt": 1}},
+        *unregistered,
+    ]
+
+    async def orphans():
+        # Only orphaned channels are remembered, to skip them in the archive pass
+        seen = set()
+        async for orphan in db.tips.aggregate(hot_pipeline, allowDiskUse=True, batchSize=args.batch_size):
+            seen.add(orphan["_id"])
+            archived = await get_archived_totals(db, "channel", orphan["_id"])
+            if archived:
+                orphan["tips"] += archived["count"]
+                orphan["amount"] += archived["amount"]
+                orphan["lastTipAt"] = max(orphan["lastTipAt"], archived["lastTipAt"])
+            yield {"channelId": orphan["_id"], "tips": orphan["tips"], "amount": orphan["amount"], "lastTipAt": orphan["lastTipAt"]}
+        # Channels whose tips have all been archived
+        async for orphan in db.tip_archive_rollups.aggregate(archive_pipeline, batchSize=args.batch_size):
+            if orphan["_id"] not in seen:
+                yield {"channelId": orphan["_id"], "tips": orphan["tips"], "amount": orphan["amount"], "lastTipAt": orphan["lastTipAt"]}
+
+    rows = await write_rows(orphans(), args, ["channelId", "tips", "amount", "lastTipAt"])
+    return 1 if rows else 0
+
+
+async def reconcile_stats(db, args) -> int:
+    """Compare channel totals with db.tips, rewriting them with --fix"""
+    report = await tip_stats.reconcile(db, channel_id=args.channel, fix=args.fix)
+
+    async def drift_rows():
+        for entry in report["drift"]:
+            stored, actual = entry["stored"], entry["actual"] or {}
+            yield {
+                "channelId": entry["channelId"],
+                **{f"stored.{field}": stored.get(field) for field in tip_stats.STATS_FIELDS},
+                **{f"actual.{field}": actual.get(field) for field in tip_stats.STATS_FIELDS},
+            }
+
+    fields = ["channelId"] + [f"{side}.{field}" for side in ("stored", "actual") for field in tip_stats.STATS_FIELDS]
+    await write_rows(drift_rows(), args, fields)
+    action = "fixed" if args.fix else "found"
+    print(f"Checked {report['channelsChecked']} channel(s), drift {action} in {report['channelsDrifted']}", file=sys.stderr)
+    return 1 if report["channelsDrifted"] and not args.fix else 0
+
+
+async def top_report(db, args) -> int:
+    """Top channels for a window, with each channel's top supporters fetched concurrently"""
+    now = datetime.utcnow()
+    channels = await tip_stats.get_leaderboard(db, "channels", "", args.window, args.limit, now)
+    supporters = await asyncio.gather(*(
+        tip_stats.get_leaderboard(db, "supporters", channel["id"], args.window, args.supporters, now)
+        for channel in channels
+    )) if args.supporters else [[] for _ in channels]
+
+    async def rows():
+        for channel, top in zip(channels, supporters):
+            yield {
+                "rank": channel["rank"],
+                "channelId": channel["id"],
+                "totalAmount": channel["totalAmount"],
+                "totalTips": channel["totalTips"],
+                "topSupporters": ", ".join(f"{s['id']} ({s['totalAmount']})" for s in top),
+            }
+
+    await write_rows(rows(), args, ["rank", "channelId", "totalAmount", "totalTips", "topSupporters"])
+    return 0
+
+
+async def summary(db, args) -> int:
+    """Collection counts and tip totals across both tip tiers, queried concurrently"""
+
+    async def hot_totals():
+        pipeline = [{"$group": {"_id": None, "amount": {"$sum": "$amount"}, "first": {"$min": "$timestamp"}, "last": {"$max": "$timestamp"}}}]
+        result = await db.tips.aggregate(pipeline, allowDiskUse=True).to_list(1)
+        return result[0] if result else {}
+
+    async def archived_totals():
+        # Read from the per-channel rollups instead of scanning the archive
+        pipeline = [
+            {"$match": {"kind": "channel"}},
+            {"$group": {"_id": None, "amount": {"$sum": "$amount"}, "first": {"$min": "$firstTipAt"}, "last": {"$max": "$lastTipAt"}}},
+        ]
+        result = await db.tip_archive_rollups.aggregate(pipeline, allowDiskUse=True).to_list(1)
+        return result[0] if result else {}
+
+    creators, connected, tips, archived_tips, channels, hot, archived = await asyncio.gather(
+        db.creators.estimated_document_count(),
+        db.creators.count_documents({"youtubeConnected": True}),
+        db.tips.estimated_document_count(),
+        db.tips_archive.estimated_document_count(),
+        db.channel_stats.estimated_document_count(),
+        hot_totals(),
+        archived_totals(),
+    )
+    first = [totals["first"] for totals in (hot, archived) if totals.get("first")]
+    last = [totals["last"] for totals in (hot, archived) if totals.get("last")]
+
+    async def rows():
+        yield {
+            "creators": creators,
+            "youtubeConnected": connected,
+            "tips": tips + archived_tips,
+            "archivedTips": archived_tips,
+            "channelsWithTips": channels,
+            "totalAmount": hot.get("amount", 0) + archived.get("amount", 0),
+            "firstTipAt": min(first, default=None),
+            "lastTipAt": max(last, default=None),
+        }
+
+    fields = ["creators", "youtubeConnected", "tips", "archivedTips", "channelsWithTips", "totalAmount", "firstTipAt", "lastTipAt"]
+    await write_rows(rows(), args, fields)
+    return 0
+
+
+COMMANDS = {
+    "creators": list_creators,
+    "orphans": find_orphans,
+    "reconcile": reconcile_stats,
+    "top": top_report,
+    "summary": summary,
+}
+
+
+async def check_database(args) -> int:
+    load_dotenv(Path(__file__).parent / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+    try:
+        if args.format == "text" and args.command == "creators":
+            print("🔍 Checking registered creators...", file=sys.stderr)
+        return await COMMANDS[args.command](db, args)
+    finally:
+        client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--format", choices=["text", "json", "ndjson", "csv"], default="text")
+    parser.add_argument("-o", "--output", help="write the report to a file instead of stdout")
+    parser.add_argument("--batch-size", type=int, default=1000, help="documents fetched per cursor batch")
+    commands = parser.add_subparsers(dest="command")
+
+    creators = commands.add_parser("creators", help="list registered creators")
+    creators.add_argument("--youtube-only", action="store_true", help="only creators with YouTube connected")
+
+    commands.add_parser("orphans", help="channels with tips but no registered creator (exit 1 if any)")
+
+    reconcile = commands.add_parser("reconcile", help="compare running tip totals with db.tips (exit 1 on drift)")
+    reconcile.add_argument("--channel", help="only this channel id")
+    reconcile.add_argument("--fix", action="store_true", help="rewrite drifted totals")
+
+    top = commands.add_parser("top", help="top channels by tips received")
+    top.add_argument("--window", choices=list(tip_stats.LEADERBOARD_WINDOWS), default="all")
+    top.add_argument("--limit", type=int, default=10)
+    top.add_argument("--supporters", type=int, default=0, help="also list each channel's top N supporters")
+
+    commands.add_parser("summary", help="collection counts and tip totals")
+
+    args = parser.parse_args()
+    if args.command is None:
+        args = parser.parse_args([*sys.argv[1:], "creators"])
+    sys.exit(asyncio.run(check_database(args)))
+
 
 if __name__ == "__main__":
-    asyncio.run(check_database())
\ No newline at end of file
+    main()
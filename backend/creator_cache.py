@@ -0,0 +1,120 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+
+class CreatorLookupCache:
+    """Bounded LRU/TTL cache for creator lookups.
+
+    Concurrent misses for the same key share a single loader call, and
+    `invalidate` bumps a generation counter so a load that raced with a
+    write never repopulates the cache with stale data.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl_seconds: float = 30.0):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    async def get(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the cached value for key, loading it at most once on a miss"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._entries[key]
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            return await asyncio.shield(pending)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        generation = self._generation
+        try:
+            value = await loader()
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else was waiting
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            if generation == self._generation:
+                self._store(key, value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+            if not future.done():
+                future.cancel()
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        """Return a fresh cached value without loading it on a miss"""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: Hashable, value: Any, generation: Optional[int] = None):
+        """Store a value loaded outside `get`, unless an invalidation happened since generation"""
+        if generation is None or generation == self._generation:
+            self._store(key, value)
+
+    def _store(self, key: Hashable, value: Any):
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, *keys: Hashable):
+        """Drop the given keys and discard any load that is currently in flight"""
+        self._generation += 1
+        self.invalidations += 1
+        for key in keys:
+            self._entries.pop(key, None)
+
+    def invalidate_where(self, predicate: Callable[[Any], bool]):
+        """Drop every cached entry whose value matches predicate"""
+        self._generation += 1
+        self.invalidations += 1
+        for key in [k for k, (_, v) in self._entries.items() if predicate(v)]:
+            del self._entries[key]
+
+    def clear(self):
+        self._generation += 1
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "size": len(self._entries),
+            "maxSize": self.max_size,
+            "ttlSeconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "hitRatio": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+        }
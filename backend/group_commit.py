@@ -0,0 +1,120 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Awaitable, Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class GroupCommitQueue:
+    """Write-behind queue that commits submitted items in groups.
+
+    Items are buffered until max_batch are pending or max_delay seconds
+    have passed since the first one arrived, then handed to `flush` in one
+    call. `flush` returns one entry per item: a result, or an exception
+    for an item that failed. `submit` only returns once the batch holding
+    its item has been flushed, so callers are acknowledged after the write
+    and never before. An item whose caller goes away is still written.
+    """
+
+    def __init__(
+        self,
+        flush: Callable[[List[Any]], Awaitable[List[Any]]],
+        max_batch: int = 200,
+        max_delay: float = 0.005,
+        max_pending: int = 10000
+    ):
+        self._flush = flush
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.max_pending = max_pending
+        self._pending: deque = deque()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closed = False
+        self.batches = 0
+        self.items = 0
+        self.failures = 0
+
+    def start(self):
+        self._wakeup = asyncio.Event()
+        self._closed = False
+        self._task = asyncio.create_task(self._run())
+
+    async def submit(self, item: Any) -> Any:
+        """Queue an item and wait until the batch containing it is committed"""
+        if self._closed or self._task is None:
+            raise RuntimeError("Group commit queue is not running")
+        if len(self._pending) >= self.max_pending:
+            raise QueueFullError("Group commit queue is full")
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((item, future))
+        self._wakeup.set()
+        return await future
+
+    async def close(self):
+        """Stop accepting items and flush everything already queued"""
+        if self._task is None:
+            return
+        self._closed = True
+        self._wakeup.set()
+        await self._task
+        self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            if not self._pending:
+                if self._closed:
+                    return
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            # Give the group a short window to fill up unless we are draining
+            deadline = loop.time() + self.max_delay
+            while len(self._pending) < self.max_batch and not self._closed:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), remaining)
+                except asyncio.TimeoutError:
+                    break
+
+            batch = [self._pending.popleft() for _ in range(min(self.max_batch, len(self._pending)))]
+            await self._commit(batch)
+
+    async def _commit(self, batch):
+        try:
+            results = await self._flush([item for item, _ in batch])
+        except Exception as e:
+            logger.exception("Group commit flush of %d items failed", len(batch))
+            results = [e] * len(batch)
+
+        self.batches += 1
+        self.items += len(batch)
+        for (_, future), result in zip(batch, results):
+            if isinstance(result, Exception):
+                self.failures += 1
+                if not future.done():
+                    future.set_exception(result)
+            elif not future.done():
+                future.set_result(result)
+
+    def stats(self):
+        return {
+            "enabled": self._task is not None,
+            "pending": len(self._pending),
+            "maxBatch": self.max_batch,
+            "maxDelayMs": self.max_delay * 1000,
+            "batches": self.batches,
+            "items": self.items,
+            "failures": self.failures,
+            "averageBatchSize": round(self.items / self.batches, 2) if self.batches else 0.0,
+        }
@@ -0,0 +1,171 @@
+import asyncio
+import hashlib
+import logging
+import math
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings.
+
+    Sized from the expected number of items n and target false-positive
+    rate p: m = -n*ln(p)/ln(2)^2 bits and k = m/n*ln(2) hash functions.
+    For 1M creators (2M channel ids, counting both channelId and
+    youtubeChannelId) at p = 1% that is ~19.2M bits (~2.3 MiB) with k = 7;
+    an exact Python set of the same ids would need roughly 200+ MiB.
+    There are no false negatives for the ids added, so a miss is safe to
+    answer without a database round trip as long as every registered id
+    was added.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.num_hashes = max(1, int(round(self.num_bits / capacity * math.log(2))))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, item: str):
+        for pos in self._positions(item):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    @property
+    def size_bytes(self) -> int:
+        return len(self._bits)
+
+    def estimated_error_rate(self) -> float:
+        """False-positive rate for the number of items actually added"""
+        if not self.count:
+            return 0.0
+        return (1 - math.exp(-self.num_hashes * self.count / self.num_bits)) ** self.num_hashes
+
+
+class ChannelMembershipIndex:
+    """In-memory membership index of registered channel ids.
+
+    The index is rebuilt from db.creators at startup and kept current by
+    local writes plus a change stream on the creators collection. When
+    change streams are unavailable (standalone mongod) it falls back to a
+    periodic rebuild. Registrations made by other workers may then be
+    missing until the next rebuild (the worker bus forwards them to `add`,
+    but best effort, so datagrams can be dropped), so no lookup is
+    answered negatively unless the change stream is open. The same holds
+    until the first build completes.
+    """
+
+    def __init__(self, capacity: int = 2_000_000, error_rate: float = 0.01, rebuild_interval: float = 300.0):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.rebuild_interval = rebuild_interval
+        self._filter = BloomFilter(capacity, error_rate)
+        self._building: Optional[BloomFilter] = None
+        self._task: Optional[asyncio.Task] = None
+        self.ready = False
+        # Whether every write from other processes reaches the index
+        self.streaming = False
+        self.negative_hits = 0
+        self.passthroughs = 0
+
+    def add(self, *channel_ids: Optional[str]):
+        for channel_id in channel_ids:
+            if not channel_id:
+                continue
+            self._filter.add(channel_id)
+            if self._building is not None:
+                self._building.add(channel_id)
+
+    def might_contain(self, channel_id: str) -> bool:
+        """Return False only when channel_id is definitely not registered"""
+        if not self.ready or not self.streaming or channel_id in self._filter:
+            self.passthroughs += 1
+            return True
+        self.negative_hits += 1
+        return False
+
+    async def rebuild(self, collection):
+        """Rebuild the filter from every creator document"""
+        self._building = BloomFilter(self.capacity, self.error_rate)
+        try:
+            cursor = collection.find({}, {"_id": 0, "channelKeys": 1}).batch_size(5000)
+            async for creator in cursor:
+                for channel_id in creator.get("channelKeys", ()):
+                    self._building.add(channel_id)
+            self._filter = self._building
+            self.ready = True
+        finally:
+            self._building = None
+        if self._filter.count > self.capacity:
+            logger.warning(
+                "Channel membership index holds %d ids, above its capacity of %d; false-positive rate is now %.4f",
+                self._filter.count, self.capacity, self._filter.estimated_error_rate()
+            )
+        logger.info("Channel membership index built with %d channel ids", self._filter.count)
+
+    def start(self, collection):
+        """Build the index and keep it current in the background"""
+        self._task = asyncio.create_task(self._run(collection))
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self, collection):
+        while True:
+            try:
+                await self._watch(collection)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.streaming = False
+                logger.info(
+                    "Creator change stream unavailable (%s); rebuilding every %ss and passing every lookup through",
+                    e, self.rebuild_interval
+                )
+                try:
+                    await self.rebuild(collection)
+                except Exception:
+                    logger.exception("Channel membership index rebuild failed")
+                await asyncio.sleep(self.rebuild_interval)
+
+    async def _watch(self, collection):
+        # Open the stream before the full scan so no write falls in between
+        pipeline = [{"$match": {"operationType": {"$in": ["insert", "update", "replace"]}}}]
+        async with collection.watch(pipeline, full_document="updateLookup") as stream:
+            await self.rebuild(collection)
+            self.streaming = True
+            async for change in stream:
+                creator = change.get("fullDocument") or {}
+                self.add(*creator.get("channelKeys", ()))
+
+    def stats(self):
+        return {
+            "ready": self.ready,
+            "streaming": self.streaming,
+            "channelIds": self._filter.count,
+            "capacity": self.capacity,
+            "targetErrorRate": self.error_rate,
+            "estimatedErrorRate": round(self._filter.estimated_error_rate(), 6),
+            "sizeBytes": self._filter.size_bytes,
+            "hashFunctions": self._filter.num_hashes,
+            "negativeHits": self.negative_hits,
+            "passthroughs": self.passthroughs,
+        }
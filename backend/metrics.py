@@ -0,0 +1,230 @@
+import threading
+import time
+from typing import Callable, Dict, Iterable
+
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client.core import GaugeMetricFamily
+from pymongo import monitoring
+from starlette.routing import Match
+
+registry = CollectorRegistry(auto_describe=True)
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+http_requests_total = Counter(
+    "amplify_http_requests_total", "HTTP requests handled",
+    ["method", "route", "status"], registry=registry
+)
+http_request_duration = Histogram(
+    "amplify_http_request_duration_seconds", "HTTP request latency",
+    ["method", "route", "status"], buckets=LATENCY_BUCKETS, registry=registry
+)
+http_requests_in_flight = Gauge(
+    "amplify_http_requests_in_flight", "HTTP requests currently being handled",
+    ["method", "route"], registry=registry
+)
+http_requests_rejected_total = Counter(
+    "amplify_http_requests_rejected_total", "HTTP requests shed by admission control or rate limits",
+    ["route", "reason"], registry=registry
+)
+mongo_command_duration = Histogram(
+    "amplify_mongo_command_duration_seconds", "MongoDB command latency",
+    ["collection", "command", "outcome"], buckets=LATENCY_BUCKETS, registry=registry
+)
+mongo_pool_checkout_wait = Histogram(
+    "amplify_mongo_pool_checkout_wait_seconds", "Time spent waiting for a pooled MongoDB connection",
+    ["outcome"], buckets=LATENCY_BUCKETS, registry=registry
+)
+mongo_reads_total = Counter(
+    "amplify_mongo_reads_total", "MongoDB read commands by the role of the member that served them",
+    ["role", "command"], registry=registry
+)
+
+CONTENT_TYPE = CONTENT_TYPE_LATEST
+
+READ_COMMANDS = {"find", "getMore", "aggregate", "count", "distinct"}
+
+# Server type per (host, port), kept current by MongoTopologyListener
+server_roles: Dict[tuple, str] = {}
+
+ROLE_NAMES = {
+    "RSPrimary": "primary",
+    "RSSecondary": "secondary",
+    "Standalone": "standalone",
+    "Mongos": "mongos",
+    "LoadBalancer": "load_balancer",
+}
+
+
+def render() -> bytes:
+    return generate_latest(registry)
+
+
+def route_template(scope, routes: Iterable) -> str:
+    """Path template of the route matching a request, resolved once and kept on the scope"""
+    route = scope.get("amplify.route")
+    if route is None:
+        route = "unmatched"
+        for candidate in routes:
+            match, _ = candidate.matches(scope)
+            if match == Match.FULL:
+                route = candidate.path
+                break
+        scope["amplify.route"] = route
+    return route
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording per-route request counts, latency and in-flight requests.
+
+    Requests are labelled with the matched route template rather than the
+    raw path so label cardinality stays bounded.
+    """
+
+    def __init__(self, app, routes_provider: Callable[[], Iterable]):
+        self.app = app
+        self.routes_provider = routes_provider
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = route_template(scope, self.routes_provider())
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        in_flight = http_requests_in_flight.labels(method, route)
+        in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            in_flight.dec()
+            code = str(status["code"])
+            http_requests_total.labels(method, route, code).inc()
+            http_request_duration.labels(method, route, code).observe(elapsed)
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    """Times every MongoDB command per collection and command name"""
+
+    def __init__(self):
+        self._started: Dict[tuple, str] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(event) -> tuple:
+        return (event.connection_id, event.request_id, event.operation_id)
+
+    def started(self, event):
+        collection = event.command.get(event.command_name)
+        if not isinstance(collection, str):
+            collection = "none"
+        with self._lock:
+            self._started[self._key(event)] = collection
+
+    def _finish(self, event, outcome: str):
+        with self._lock:
+            collection = self._started.pop(self._key(event), "unknown")
+        mongo_command_duration.labels(collection, event.command_name, outcome).observe(event.duration_micros / 1e6)
+        if event.command_name in READ_COMMANDS:
+            role = server_roles.get(event.connection_id, "unknown")
+            mongo_reads_total.labels(role, event.command_name).inc()
+
+    def succeeded(self, event):
+        self._finish(event, "success")
+
+    def failed(self, event):
+        self._finish(event, "failure")
+
+
+class MongoTopologyListener(monitoring.ServerListener):
+    """Tracks whether each server is a primary or secondary for the read split metric"""
+
+    def opened(self, event):
+        pass
+
+    def description_changed(self, event):
+        server_roles[event.server_address] = ROLE_NAMES.get(event.new_description.server_type_name, "unknown")
+
+    def closed(self, event):
+        server_roles.pop(event.server_address, None)
+
+
+class MongoPoolListener(monitoring.ConnectionPoolListener):
+    """Measures how long operations wait to check a connection out of the pool.
+
+    pymongo checks connections out on the thread that runs the operation,
+    so the start of each checkout is tracked per thread.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def connection_check_out_started(self, event):
+        self._local.started = time.perf_counter()
+
+    def _observe(self, outcome: str):
+        started = getattr(self._local, "started", None)
+        if started is not None:
+            mongo_pool_checkout_wait.labels(outcome).observe(time.perf_counter() - started)
+            self._local.started = None
+
+    def connection_checked_out(self, event):
+        self._observe("success")
+
+    def connection_check_out_failed(self, event):
+        self._observe("failure")
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        pass
+
+    def connection_checked_in(self, event):
+        pass
+
+
+class StatsCollector:
+    """Exposes the counters of in-process components as Prometheus gauges.
+
+    `sources` maps a metric prefix to a callable returning a flat dict of
+    numbers, such as CreatorLookupCache.stats.
+    """
+
+    def __init__(self, sources: Dict[str, Callable[[], dict]]):
+        self.sources = sources
+
+    def collect(self):
+        for prefix, stats in self.sources.items():
+            for name, value in stats().items():
+                if not isinstance(value, (int, float)):
+                    continue
+                yield GaugeMetricFamily(f"amplify_{prefix}_{_snake_case(name)}", f"{prefix} {name}", value=value)
+
+
+def _snake_case(name: str) -> str:
+    return "".join(f"_{c.lower()}" if c.isupper() else c for c in name)
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""Database migrations for the Amplify API.
+
+Index builds are run out of band with this command instead of on every
+worker start; the API only checks at startup that they exist.
+
+    python migrate.py indexes            # create any missing indexes
+    python migrate.py indexes --check    # exit 1 if any are missing
+    python migrate.py dedupe-tips        # drop replayed tips before the unique signature indexes
+    python migrate.py channel-keys       # backfill channelKeys and canonicalChannelId, re-key tips
+    python migrate.py rollup-tippers     # move rollup tipper arrays into tip_rollup_tippers
+    python migrate.py leaderboards       # rebuild the leaderboards from every recorded tip
+"""
+import argparse
+import asyncio
+import os
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateMany, UpdateOne
+from pymongo.errors import BulkWriteError
+
+import tip_stats
+
+# collection -> [(keys, options)]
+INDEXES: Dict[str, List[Tuple[list, dict]]] = {
+    "creators": [
+        # Every id a creator answers to; the one index behind channel lookups
+        ([("channelKeys", 1)], {"unique": True, "partialFilterExpression": {"channelKeys": {"$exists": True}}}),
+        ([("channelId", 1)], {"unique": True, "sparse": True}),
+        ([("youtubeChannelId", 1)], {"unique": True, "sparse": True}),
+        ([("walletAddress", 1)], {"unique": True}),
+    ],
+    "tips": [
+        # Compound indexes serve both the filter and the newest-first keyset sort
+        ([("channelId", 1), ("timestamp", -1), ("id", -1)], {}),
+        ([("toWallet", 1), ("timestamp", -1), ("id", -1)], {}),
+        ([("timestamp", 1)], {}),
+        # One row per on-chain transaction; makes tip recording idempotent
+        ([("signature", 1)], {"unique": True}),
+    ],
+    "tips_archive": [
+        ([("channelId", 1), ("timestamp", -1), ("id", -1)], {}),
+        ([("toWallet", 1), ("timestamp", -1), ("id", -1)], {}),
+        # Together with the archive check on insert, keeps signatures unique across both tiers
+        ([("signature", 1)], {"unique": True}),
+    ],
+    "tip_archive_rollups": [
+        ([("kind", 1), ("key", 1)], {"unique": True}),
+    ],
+    "tip_rollups": [
+        ([("channelId", 1), ("granularity", 1), ("bucket", 1)], {"unique": True}),
+    ],
+    "leaderboards": [
+        ([("board", 1), ("scope", 1), ("period", 1), ("member", 1)], {"unique": True}),
+        # Serves the top-N read, tiebreak included, without an in-memory sort
+        ([("board", 1), ("scope", 1), ("period", 1), ("amount", -1), ("member", 1)], {}),
+        ([("expiresAt", 1)], {"expireAfterSeconds": 0}),
+    ],
+}
+
+
+async def missing_indexes(db) -> List[Tuple[str, list]]:
+    """List (collection, keys) for every expected index that does not exist"""
+
+    async def check(collection: str, specs):
+        existing = {tuple(info["key"]) for info in (await db[collection].index_information()).values()}
+        return [(collection, keys) for keys, _ in specs if tuple(keys) not in existing]
+
+    results = await asyncio.gather(*(check(name, specs) for name, specs in INDEXES.items()))
+    return [missing for result in results for missing in result]
+
+
+async def create_indexes(db) -> List[str]:
+    """Create every expected index; existing ones are left untouched"""
+    created = []
+    for collection, specs in INDEXES.items():
+        for keys, options in specs:
+            name = await db[collection].create_index(keys, **options)
+            created.append(f"{collection}.{name}")
+    return created
+
+
+async def run_indexes(db, check_only: bool) -> int:
+    missing = await missing_indexes(db)
+    if check_only:
+        for collection, keys in missing:
+            print(f"Missing index on {collection}: {keys}")
+        return 1 if missing else 0
+    print("Creating indexes...")
+    for name in await create_indexes(db):
+        print(f"  {name}")
+    return 0
+
+
+async def dedupe_tips(db, dry_run: bool, batch_size: int = 1000) -> int:
+    """Keep the earliest tip per signature across both tiers and delete the replays.
+
+    Within each tier the earliest copy is kept; a hot tip whose signature
+    is already archived is always the replay.
+    """
+    pipeline = [
+        {"$sort": {"timestamp": 1, "id": 1}},
+        {"$group": {"_id": "$signature", "ids": {"$push": "$_id"}, "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}},
+    ]
+    removed = {"tips_archive": 0, "tips": 0}
+    for collection in ("tips_archive", "tips"):
+        async for group in db[collection].aggregate(pipeline, allowDiskUse=True):
+            duplicates = group["ids"][1:]
+            removed[collection] += len(duplicates)
+            if not dry_run:
+                await db[collection].delete_many({"_id": {"$in": duplicates}})
+
+    async def drop_archived(tips):
+        archived = {
+            tip["signature"]
+            async for tip in db.tips_archive.find({"signature": {"$in": [tip["signature"] for tip in tips]}}, {"_id": 0, "signature": 1})
+        }
+        duplicates = [tip["_id"] for tip in tips if tip["signature"] in archived]
+        removed["tips"] += len(duplicates)
+        if duplicates and not dry_run:
+            await db.tips.delete_many({"_id": {"$in": duplicates}})
+
+    batch = []
+    async for tip in db.tips.find({}, {"_id": 1, "signature": 1}).batch_size(batch_size):
+        batch.append(tip)
+        if len(batch) >= batch_size:
+            await drop_archived(batch)
+            batch = []
+    if batch:
+        await drop_archived(batch)
+
+    action = "Would remove" if dry_run else "Removed"
+    print(f"{action} {removed['tips']} duplicate hot tip(s) and {removed['tips_archive']} duplicate archived tip(s)")
+    if not dry_run:
+        if removed["tips_archive"]:
+            print("Run `python tip_archive.py rebuild-rollups` to rebuild the archive rollups")
+        if removed["tips"] or removed["tips_archive"]:
+            print("Run `python check_database.py reconcile --fix` to rebuild channel totals")
+    return 0
+
+
+async def backfill_channel_keys(db, batch_size: int = 1000) -> int:
+    """Set channelKeys and canonicalChannelId on every creator and move tips onto the canonical id.
+
+    A creator without canonicalChannelId has it pinned to youtubeChannelId,
+    else channelId, and tips recorded under their other id are re-keyed to
+    it. Once set it never changes, so running this again is a no-op.
+    """
+    creator_ops, tip_ops = [], []
+    updated = rekeyed = conflicts = 0
+
+    async def flush():
+        nonlocal updated, rekeyed, conflicts
+        if creator_ops:
+            try:
+                result = await db.creators.bulk_write(creator_ops, ordered=False)
+                updated += result.modified_count
+            except BulkWriteError as e:
+                updated += e.details.get("nModified", 0)
+                for error in e.details.get("writeErrors", []):
+                    conflicts += 1
+                    print(f"  Conflict: {error['errmsg']}")
+        if tip_ops:
+            rekeyed += (await db.tips.bulk_write(tip_ops, ordered=False)).modified_count
+        creator_ops.clear()
+        tip_ops.clear()
+
+    cursor = db.creators.find({}, {"_id": 1, "canonicalChannelId": 1, "channelId": 1, "youtubeChannelId": 1}).batch_size(batch_size)
+    async for creator in cursor:
+        canonical = creator.get("canonicalChannelId") or creator.get("youtubeChannelId") or creator.get("channelId")
+        if not canonical:
+            continue
+        keys = list(dict.fromkeys(key for key in (canonical, creator.get("channelId"), creator.get("youtubeChannelId")) if key))
+        creator_ops.append(UpdateOne({"_id": creator["_id"]}, {"$set": {"channelKeys": keys, "canonicalChannelId": canonical}}))
+        tip_ops.extend(
+            UpdateMany({"channelId": key}, {"$set": {"channelId": canonical}})
+            for key in keys if key != canonical
+        )
+        if len(creator_ops) >= batch_size:
+            await flush()
+    await flush()
+
+    print(f"Backfilled channelKeys on {updated} creator(s), re-keyed {rekeyed} tip(s)")
+    if rekeyed:
+        print("Run `python check_database.py reconcile --fix` to rebuild channel totals")
+    return 1 if conflicts else 0
+
+
+async def move_rollup_tippers(db, batch_size: int = 1000) -> int:
+    """Replace the tippers array of every rollup bucket with tip_rollup_tippers rows and a uniqueTippers count.
+
+    Wallets already recorded for a bucket since the upgrade are not counted
+    again, so this is safe to run while tips are being recorded.
+    """
+    moved = 0
+    cursor = db.tip_rollups.find({"tippers": {"$exists": True}}, {"channelId": 1, "granularity": 1, "bucket": 1, "tippers": 1}).batch_size(batch_size)
+    async for rollup in cursor:
+        key = (rollup["channelId"], rollup["granularity"], rollup["bucket"])
+        new = await tip_stats.record_tippers(db, {key: {wallet: rollup["bucket"] for wallet in rollup["tippers"]}})
+        await db.tip_rollups.update_one(
+            {"_id": rollup["_id"]},
+            {"$inc": {"uniqueTippers": new.get(key, 0)}, "$unset": {"tippers": ""}}
+        )
+        moved += 1
+    print(f"Moved the tippers of {moved} rollup bucket(s)")
+    return 0
+
+
+async def rebuild_leaderboards(db, batch_size: int = 1000) -> int:
+    """Rebuild every leaderboard from the archived and hot tips.
+
+    The boards are built in a side collection that then replaces
+    leaderboards, so readers never see a partial board. Tips recorded
+    while it runs can be missed or counted twice, so run it with tip
+    recording stopped.
+    """
+    staging = db.leaderboards_rebuild
+    await staging.drop()
+    for keys, options in INDEXES["leaderboards"]:
+        await staging.create_index(keys, **options)
+    counted = 0
+
+    async def add(tips):
+        nonlocal counted
+        if tips:
+            await staging.bulk_write(tip_stats.leaderboard_updates(tips), ordered=False)
+            counted += len(tips)
+
+    async def add_hot(tips):
+        if not tips:
+            return
+        # A tip mid-archival is in both tiers and was already counted from the archive
+        archived = {
+            tip["signature"]
+            async for tip in db.tips_archive.find({"signature": {"$in": [tip["signature"] for tip in tips]}}, {"_id": 0, "signature": 1})
+        }
+        await add([tip for tip in tips if tip["signature"] not in archived])
+
+    fields = {"_id": 0, "timestamp": 1, "fromWallet": 1, "channelId": 1, "amount": 1, "signature": 1}
+    # Tips whose counters failed are counted by their replay, not here
+    query = {"applied": {"$ne": False}}
+    for collection, flush in ((db.tips_archive, add), (db.tips, add_hot)):
+        batch = []
+        async for tip in collection.find(query, fields).batch_size(batch_size):
+            batch.append(tip)
+            if len(batch) >= batch_size:
+                await flush(batch)
+                batch = []
+        await flush(batch)
+
+    await staging.rename("leaderboards", dropTarget=True)
+    print(f"Rebuilt the leaderboards from {counted} tip(s)")
+    return 0
+
+
+async def migrate(args) -> int:
+    load_dotenv(Path(__file__).parent / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+    try:
+        if args.command == "indexes":
+            return await run_indexes(db, args.check)
+        if args.command == "dedupe-tips":
+            return await dedupe_tips(db, args.dry_run)
+        if args.command == "channel-keys":
+            return await backfill_channel_keys(db)
+        if args.command == "rollup-tippers":
+            return await move_rollup_tippers(db)
+        if args.command == "leaderboards":
+            return await rebuild_leaderboards(db)
+        return 2
+    finally:
+        client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    indexes = commands.add_parser("indexes", help="create the indexes the API relies on")
+    indexes.add_argument("--check", action="store_true", help="only report missing indexes")
+    dedupe = commands.add_parser("dedupe-tips", help="remove tips that repeat an earlier signature")
+    dedupe.add_argument("--dry-run", action="store_true", help="only count the duplicates")
+    commands.add_parser("channel-keys", help="backfill the unified channel key field on creators")
+    commands.add_parser("rollup-tippers", help="move unique tippers out of the rollup documents")
+    commands.add_parser("leaderboards", help="rebuild the leaderboards from the recorded tips")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(migrate(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+import math
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+import orjson
+
+import metrics
+
+# (tokens added per second, bucket size)
+Budget = Tuple[float, float]
+
+
+class TokenBucketLimiter:
+    """In-memory token buckets keyed by e.g. (route, "ip", address).
+
+    Buckets start full and refill continuously. The least recently used
+    buckets are dropped beyond max_keys, which at worst hands a quiet
+    client a fresh bucket.
+    """
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.allowed = 0
+        self.limited = 0
+
+    def acquire(self, key: Hashable, budget: Budget) -> float:
+        """Take a token for key; returns 0 when allowed, else seconds until one is available"""
+        rate, burst = budget
+        now = time.monotonic()
+        entry = self._buckets.get(key)
+        if entry is None:
+            tokens = burst
+        else:
+            tokens = min(burst, entry[0] + (now - entry[1]) * rate)
+            self._buckets.move_to_end(key)
+
+        if tokens >= 1:
+            self._buckets[key] = (tokens - 1, now)
+            retry_after = 0.0
+            self.allowed += 1
+        else:
+            self._buckets[key] = (tokens, now)
+            retry_after = (1 - tokens) / rate
+            self.limited += 1
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return retry_after
+
+    def stats(self):
+        return {
+            "buckets": len(self._buckets),
+            "maxKeys": self.max_keys,
+            "allowed": self.allowed,
+            "limited": self.limited,
+        }
+
+
+class AdmissionMiddleware:
+    """ASGI middleware applying per-IP rate limits and a global in-flight cap.
+
+    Each route template has a token-bucket budget per client address
+    (`budgets`, else `default_budget`; None disables it), answered with 429
+    when spent. Once max_in_flight requests are being handled, further
+    ones are shed with 503 so load never queues up behind an exhausted
+    Mongo pool. Both carry Retry-After. Routes under `exempt_prefixes`,
+    such as health checks and long-lived streams, bypass both checks.
+    """
+
+    def __init__(
+        self,
+        app,
+        routes_provider: Callable[[], Iterable],
+        limiter: TokenBucketLimiter,
+        budgets: Dict[str, Budget],
+        default_budget: Optional[Budget],
+        max_in_flight: int,
+        exempt_prefixes: Tuple[str, ...] = ()
+    ):
+        self.app = app
+        self.routes_provider = routes_provider
+        self.limiter = limiter
+        self.budgets = budgets
+        self.default_budget = default_budget
+        self.max_in_flight = max_in_flight
+        self.exempt_prefixes = exempt_prefixes
+        self.in_flight = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "OPTIONS" or scope["path"].startswith(self.exempt_prefixes):
+            await self.app(scope, receive, send)
+            return
+
+        route = metrics.route_template(scope, self.routes_provider())
+        budget = self.budgets.get(route, self.default_budget)
+        client = scope.get("client")
+        if budget and client:
+            retry_after = self.limiter.acquire((route, "ip", client[0]), budget)
+            if retry_after:
+                await reject(send, route, "ip", 429, "Rate limit exceeded", retry_after)
+                return
+
+        if self.in_flight >= self.max_in_flight:
+            await reject(send, route, "overload", 503, "Server busy, retry shortly", 1)
+            return
+
+        self.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
+
+
+async def reject(send, route: str, reason: str, status: int, detail: str, retry_after: float):
+    metrics.http_requests_rejected_total.labels(route, reason).inc()
+    body = orjson.dumps({"detail": detail})
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(math.ceil(retry_after)).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
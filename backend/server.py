@@ -1,37 +1,220 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Request, Query
-from fastapi.responses import RedirectResponse
+from fastapi import FastAPI, APIRouter, HTTPException, Request, Response, Query
+from fastapi.responses import ORJSONResponse, RedirectResponse, StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from starlette.middleware.sessions import SessionMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from pymongo.write_concern import WriteConcern
+from pymongo.read_concern import ReadConcern
+from pymongo.read_preferences import Nearest, Primary, PrimaryPreferred, Secondary, SecondaryPreferred
 import os
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field
-from typing import List, Optional
+from pydantic import BaseModel, Field, ValidationError
+from typing import Any, Dict, List, Optional, Tuple
 import uuid
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 import secrets
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+
+from creator_cache import CreatorLookupCache
+from membership_index import ChannelMembershipIndex
+import tip_stats
+from group_commit import GroupCommitQueue, QueueFullError
+from tip_feed import FeedFullError, TipFeed
+from worker_bus import WorkerBus
+from rate_limit import AdmissionMiddleware, TokenBucketLimiter
+import metrics
+import migrate
 
-# Google OAuth imports
-from google.auth.transport.requests import Request as GoogleRequest
-from google_auth_oauthlib.flow import Flow
-from googleapiclient.discovery import build
 import json
+import base64
+import hashlib
+import math
+import csv
+import io
+import orjson
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
+# Maximum number of ids accepted by POST /api/creators/batch
+MAX_BATCH_LOOKUP = int(os.environ.get('MAX_BATCH_LOOKUP', '100'))
+
+# Largest page size accepted by the tip history endpoints
+MAX_TIPS_PAGE = int(os.environ.get('MAX_TIPS_PAGE', '500'))
+
+# Maximum number of tips accepted by POST /api/tips/batch
+MAX_TIP_BATCH = int(os.environ.get('MAX_TIP_BATCH', '1000'))
+
+# Largest number of buckets a single time-series request may span
+MAX_TIMESERIES_BUCKETS = int(os.environ.get('MAX_TIMESERIES_BUCKETS', '1000'))
+
+# Optional write-behind group commit for POST /api/tip
+TIP_GROUP_COMMIT = os.environ.get('TIP_GROUP_COMMIT', 'false').lower() in ('1', 'true', 'yes')
+
+# Seconds browsers and CDNs may reuse creator and stats responses before revalidating
+CREATOR_MAX_AGE = int(os.environ.get('CREATOR_MAX_AGE', '60'))
+STATS_MAX_AGE = int(os.environ.get('STATS_MAX_AGE', '10'))
+
+# Seconds between keep-alive comments on an idle live tip feed
+FEED_HEARTBEAT_SECONDS = float(os.environ.get('FEED_HEARTBEAT_SECONDS', '15'))
+
+# Multi-worker mode: every worker signs sessions with the shared SESSION_SECRET
+# (OAuth state set on one worker is read back on another) and keeps its
+# in-memory caches and live feeds in step over a socket directory
+SESSION_SECRET = os.environ.get('SESSION_SECRET')
+WORKER_BUS_DIR = os.environ.get('WORKER_BUS_DIR')
+if WORKER_BUS_DIR and not SESSION_SECRET:
+    raise RuntimeError("SESSION_SECRET must be set when WORKER_BUS_DIR enables multi-worker mode")
+
+# Cursor batch size for streaming tip exports
+EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', '1000'))
+
+# MongoDB connection pool settings; unset values keep the driver defaults
+MONGO_POOL_OPTIONS = {
+    option: int(os.environ[env])
+    for option, env in (
+        ("maxPoolSize", "MONGO_MAX_POOL_SIZE"),
+        ("minPoolSize", "MONGO_MIN_POOL_SIZE"),
+        ("waitQueueTimeoutMS", "MONGO_WAIT_QUEUE_TIMEOUT_MS"),
+        ("maxIdleTimeMS", "MONGO_MAX_IDLE_TIME_MS"),
+    )
+    if os.environ.get(env)
+}
+
+# Admission control. Token-bucket budgets of (requests per second, burst)
+# apply per client IP to every route, and per wallet and client IP to the
+# routes that name one; RATE_LIMITS takes a JSON object of route ->
+# [rate, burst] overrides, "default" included, and null disables a budget.
+# Off by default: budgets are keyed on the client address, so behind a
+# proxy only enable it once uvicorn runs with --proxy-headers and
+# --forwarded-allow-ips naming the proxy, or every user shares one bucket.
+RATE_LIMITING = os.environ.get('RATE_LIMITING', 'false').lower() in ('1', 'true', 'yes')
+RATE_LIMITS = {
+    "default": (50, 100),
+    "/api/creator": (20, 40),
+    "/api/creators/batch": (5, 10),
+    "/api/tip": (5, 20),
+    "/api/tips/batch": (1, 3),
+    "/api/register": (0.5, 5),
+    "/api/creator/settings": (0.5, 5),
+    "/api/oauth/youtube/initiate": (0.5, 5),
+}
+RATE_LIMITS.update({
+    route: tuple(budget) if budget else None
+    for route, budget in json.loads(os.environ.get('RATE_LIMITS', '{}')).items()
+})
+# Requests handled at once before shedding with 503; keeps the queue for
+# pooled Mongo connections short (twice the pool, 100 by default)
+MAX_IN_FLIGHT = int(os.environ.get('MAX_IN_FLIGHT', str(2 * MONGO_POOL_OPTIONS.get('maxPoolSize', 100))))
+
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncIOMotorClient(
+    mongo_url,
+    event_listeners=[metrics.MongoCommandListener(), metrics.MongoPoolListener(), metrics.MongoTopologyListener()],
+    **MONGO_POOL_OPTIONS
+)
 db = client[os.environ['DB_NAME']]
 
+# Read routing. Writes, and the reads that guard them, always use `db` on the
+# primary; creator lookups and analytics reads can be sent elsewhere with
+# MONGO_<ROUTE>_READ_PREFERENCE / _READ_CONCERN (route: LOOKUP or ANALYTICS),
+# falling back to MONGO_READ_PREFERENCE / MONGO_READ_CONCERN. Secondary reads
+# may lag the primary, and a lagging creator lookup stays cached for the
+# creator cache TTL.
+READ_PREFERENCES = {
+    "primary": Primary,
+    "primaryPreferred": PrimaryPreferred,
+    "secondary": Secondary,
+    "secondaryPreferred": SecondaryPreferred,
+    "nearest": Nearest,
+}
+
+def read_options(route: str) -> dict:
+    """Collect the configured read preference and read concern for a read route"""
+    mode = os.environ.get(f'MONGO_{route.upper()}_READ_PREFERENCE', os.environ.get('MONGO_READ_PREFERENCE', 'primary'))
+    level = os.environ.get(f'MONGO_{route.upper()}_READ_CONCERN', os.environ.get('MONGO_READ_CONCERN'))
+    max_staleness = int(os.environ.get('MONGO_MAX_STALENESS_SECONDS', '-1'))
+    if mode not in READ_PREFERENCES:
+        raise ValueError(f"Unknown read preference for {route} reads: {mode}")
+    
+    options = {}
+    if mode != "primary":
+        options["read_preference"] = READ_PREFERENCES[mode](max_staleness=max_staleness)
+    if level:
+        options["read_concern"] = ReadConcern(level)
+    return options
+
+READ_OPTIONS = {route: read_options(route) for route in ("lookup", "analytics")}
+_read_dbs: Dict[str, tuple] = {}
+
+def read_db(route: str):
+    """Database handle carrying the read preference and concern for a read route"""
+    cached = _read_dbs.get(route)
+    if cached is None or cached[0] is not db:
+        options = READ_OPTIONS[route]
+        cached = (db, db.with_options(**options) if options else db)
+        _read_dbs[route] = cached
+    return cached[1]
+
+# In-process cache in front of the hot /api/creator lookup
+creator_cache = CreatorLookupCache(
+    max_size=int(os.environ.get('CREATOR_CACHE_SIZE', '10000')),
+    ttl_seconds=float(os.environ.get('CREATOR_CACHE_TTL_SECONDS', '30'))
+)
+
+# Bloom filter of registered channel ids so unknown channels skip Mongo; it
+# only answers misses while the creators change stream is open
+channel_index = ChannelMembershipIndex(
+    capacity=int(os.environ.get('CHANNEL_INDEX_CAPACITY', '2000000')),
+    error_rate=float(os.environ.get('CHANNEL_INDEX_ERROR_RATE', '0.01')),
+    rebuild_interval=float(os.environ.get('CHANNEL_INDEX_REBUILD_SECONDS', '300'))
+)
+
+# Groups concurrent POST /api/tip writes into insert_many calls when enabled
+tip_commit_queue = GroupCommitQueue(
+    flush=lambda records: flush_tip_group(records),
+    max_batch=int(os.environ.get('TIP_GROUP_COMMIT_MAX_BATCH', '200')),
+    max_delay=float(os.environ.get('TIP_GROUP_COMMIT_MAX_DELAY_MS', '5')) / 1000,
+    max_pending=int(os.environ.get('TIP_GROUP_COMMIT_MAX_PENDING', '10000'))
+)
+
+# Live tip fan-out to dashboard and overlay streams
+tip_feed = TipFeed(
+    max_buffer=int(os.environ.get('FEED_MAX_BUFFER', '100')),
+    max_subscribers=int(os.environ.get('FEED_MAX_SUBSCRIBERS', '20000'))
+)
+
+# Buckets for both the per-IP middleware and the per-wallet endpoint checks
+rate_limiter = TokenBucketLimiter(max_keys=int(os.environ.get('RATE_LIMIT_MAX_KEYS', '100000')))
+
+# Carries cache invalidations, new channel ids and live tips to the other workers
+worker_bus = WorkerBus(WORKER_BUS_DIR, handlers={
+    "creator": lambda data: evict_cached_creator(data["wallet"], data["channels"]),
+    "channels": lambda data: channel_index.add(*data),
+    "tips": lambda data: deliver_worker_tips(data),
+})
+
+metrics.registry.register(metrics.StatsCollector({
+    "creator_cache": creator_cache.stats,
+    "channel_index": channel_index.stats,
+    "tip_group_commit": tip_commit_queue.stats,
+    "tip_feed": tip_feed.stats,
+    "worker_bus": worker_bus.stats,
+    "rate_limiter": rate_limiter.stats
+}))
+
 # Create the main app without a prefix
 app = FastAPI(title="Amplify API v2.0", version="2.0.0")
 
 # Add session middleware (required for OAuth)
-app.add_middleware(SessionMiddleware, secret_key=secrets.token_hex(32))
+app.add_middleware(SessionMiddleware, secret_key=SESSION_SECRET or secrets.token_hex(32))
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -44,6 +227,17 @@ REDIRECT_URI = os.environ.get('OAUTH_REDIRECT_URI', 'https://28bc5347-71d7-42a5-
 # OAuth Scopes
 SCOPES = ['https://www.googleapis.com/auth/youtube.readonly']
 
+# Google endpoints, overridable so tests and benchmarks can use a local stand-in
+GOOGLE_AUTH_URI = os.environ.get('GOOGLE_AUTH_URI', 'https://accounts.google.com/o/oauth2/auth')
+GOOGLE_TOKEN_URI = os.environ.get('GOOGLE_TOKEN_URI', 'https://oauth2.googleapis.com/token')
+YOUTUBE_API_ENDPOINT = os.environ.get('YOUTUBE_API_ENDPOINT')
+
+# The Google client libraries are blocking, so their calls run on a bounded
+# thread pool with a per-call timeout instead of on the event loop
+GOOGLE_API_TIMEOUT = float(os.environ.get('GOOGLE_API_TIMEOUT_SECONDS', '10'))
+GOOGLE_API_CONCURRENCY = int(os.environ.get('GOOGLE_API_CONCURRENCY', '8'))
+google_executor = ThreadPoolExecutor(max_workers=GOOGLE_API_CONCURRENCY, thread_name_prefix="google-api")
+
 # Define Enhanced Models
 class CreatorRegistration(BaseModel):
     channelId: str
@@ -75,12 +269,35 @@ class TipRecordCreate(BaseModel):
     amount: float
     signature: str
 
+class TipBatch(BaseModel):
+    # Items are validated one by one so a bad row only fails itself
+    tips: List[Dict[str, Any]]
+
+# Fields fetched from Mongo for the endpoints that return them, so large or
+# secret fields like the YouTube OAuth tokens never leave the database
+TIP_FIELDS = ["id", "timestamp", "fromWallet", "toWallet", "channelId", "amount", "signature"]
+TIP_PROJECTION = {"_id": 0, **{field: 1 for field in TIP_FIELDS}}
+# Stored tips also carry `applied`, False while their counters are not updated
+STORED_TIP_PROJECTION = {**TIP_PROJECTION, "applied": 1}
+CREATOR_PROJECTION = {
+    "_id": 0, "canonicalChannelId": 1, "channelId": 1, "youtubeChannelId": 1, "youtubeChannelName": 1,
+    "walletAddress": 1, "defaultTipAmount": 1, "youtubeConnected": 1, "registeredAt": 1
+}
+
 class CreatorSettings(BaseModel):
     defaultTipAmount: float
 
+class CreatorBatchLookup(BaseModel):
+    channelIds: List[str] = []
+    walletAddresses: List[str] = []
+
 # Utility Functions
+# The Google client libraries are only needed by the /oauth/youtube/* routes,
+# so they are imported on first use to keep worker start-up fast
 def create_oauth_flow():
     """Create and return Google OAuth flow"""
+    from google_auth_oauthlib.flow import Flow
+    
     if not GOOGLE_CLIENT_ID or not GOOGLE_CLIENT_SECRET:
         raise HTTPException(status_code=500, detail="Google OAuth not configured")
     
@@ -88,25 +305,49 @@ def create_oauth_flow():
         "web": {
             "client_id": GOOGLE_CLIENT_ID,
             "client_secret": GOOGLE_CLIENT_SECRET,
-            "auth_uri": "https://accounts.google.com/o/oauth2/auth",
-            "token_uri": "https://oauth2.googleapis.com/token",
+            "auth_uri": GOOGLE_AUTH_URI,
+            "token_uri": GOOGLE_TOKEN_URI,
             "redirect_uris": [REDIRECT_URI]
         }
     }, scopes=SCOPES)
     flow.redirect_uri = REDIRECT_URI
     return flow
 
+async def run_google_call(func, *args, **kwargs):
+    """Run a blocking Google client call on the bounded executor with a timeout"""
+    loop = asyncio.get_running_loop()
+    try:
+        return await asyncio.wait_for(
+            loop.run_in_executor(google_executor, partial(func, *args, **kwargs)),
+            timeout=GOOGLE_API_TIMEOUT
+        )
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Google API request timed out")
+
+@lru_cache(maxsize=1)
+def youtube_discovery_document() -> dict:
+    """Load and parse the bundled YouTube v3 discovery document once per process"""
+    from googleapiclient.discovery_cache import get_static_doc
+    return json.loads(get_static_doc('youtube', 'v3'))
+
+def fetch_youtube_channels(access_token: str) -> dict:
+    """Blocking call listing the channels owned by the access token"""
+    import httplib2
+    from google.oauth2.credentials import Credentials
+    from google_auth_httplib2 import AuthorizedHttp
+    from googleapiclient.discovery import build_from_document
+    
+    credentials = Credentials(token=access_token)
+    http = AuthorizedHttp(credentials, http=httplib2.Http(timeout=GOOGLE_API_TIMEOUT))
+    client_options = {"api_endpoint": YOUTUBE_API_ENDPOINT} if YOUTUBE_API_ENDPOINT else None
+    youtube = build_from_document(youtube_discovery_document(), http=http, client_options=client_options)
+    return youtube.channels().list(part='snippet', mine=True).execute()
+
 async def get_youtube_channel_info(access_token: str):
     """Get YouTube channel information using access token"""
     try:
-        from google.oauth2.credentials import Credentials
-        credentials = Credentials(token=access_token)
-        
-        youtube = build('youtube', 'v3', credentials=credentials)
-        
         # Get channel information
-        request = youtube.channels().list(part='snippet', mine=True)
-        response = request.execute()
+        response = await run_google_call(fetch_youtube_channels, access_token)
         
         if response['items']:
             channel = response['items'][0]
@@ -116,13 +357,363 @@ async def get_youtube_channel_info(access_token: str):
             }
         else:
             raise HTTPException(status_code=404, detail="No YouTube channel found")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to get YouTube channel info: {str(e)}")
 
+def channel_keys(*channel_ids: Optional[str]) -> List[str]:
+    """Every id a creator can be looked up by, stored in the multikey channelKeys field"""
+    return list(dict.fromkeys(channel_id for channel_id in channel_ids if channel_id))
+
+def canonical_channel_id(creator: dict) -> str:
+    """The one channel id a creator's tips and stats are recorded under.
+
+    Fixed when the creator is created and never changed, so connecting
+    YouTube later does not move existing tips, totals and leaderboard
+    rows to a new id. Creators from before the field existed fall back to
+    the id their tips were recorded under.
+    """
+    return creator.get("canonicalChannelId") or creator.get("youtubeChannelId") or creator.get("channelId")
+
+def creator_public_view(creator: dict) -> dict:
+    """Build the public creator payload returned by /api/creator"""
+    return {
+        "channelId": canonical_channel_id(creator),
+        "channelName": creator.get("youtubeChannelName"),
+        "walletAddress": creator["walletAddress"],
+        "defaultTipAmount": creator.get("defaultTipAmount", 0.1),
+        "youtubeConnected": creator.get("youtubeConnected", False),
+        "registeredAt": creator.get("registeredAt")
+    }
+
+async def lookup_creator(field: str, value: str) -> Optional[dict]:
+    """Resolve a creator's public payload by channelId or walletAddress through the cache"""
+    if field == "channelId":
+        if not channel_index.might_contain(value):
+            return None
+        query = {"channelKeys": value}
+    else:
+        query = {"walletAddress": value}
+    
+    async def load_creator():
+        creator = await read_db("lookup").creators.find_one(query, CREATOR_PROJECTION)
+        return creator_public_view(creator) if creator else None
+    
+    return await creator_cache.get((field, value), load_creator)
+
+async def resolve_channel_id(channel_id: str) -> str:
+    """Map either form of a channel id to the canonical one, or return it unchanged"""
+    creator = await lookup_creator("channelId", channel_id)
+    return creator["channelId"] if creator else channel_id
+
+def creator_etag(creator: dict) -> str:
+    """Version a creator payload by its digest, so any change to it changes the tag"""
+    digest = hashlib.blake2b(orjson.dumps(creator, option=orjson.OPT_SORT_KEYS), digest_size=8).hexdigest()
+    return f'W/"c-{digest}"'
+
+def stats_etag(creator: dict, version: int) -> str:
+    """Tag a stats response by its creator payload and the totals' version counter"""
+    return f'{creator_etag(creator)[:-1]}-s{version}"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against the current tag"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = [tag.strip() for tag in header.split(",")]
+    return "*" in tags or any(tag.removeprefix("W/") == etag.removeprefix("W/") for tag in tags)
+
+def cached_response(request: Request, content: Any, etag: str, max_age: int) -> Response:
+    """Answer with 304 when the client already holds this version, else the full body"""
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={max_age}"}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return ORJSONResponse(content=content, headers=headers)
+
+def to_naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Normalize a datetime to naive UTC, the form Mongo hands back"""
+    if value is not None and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def encode_tips_cursor(tip: dict) -> str:
+    """Build the opaque keyset cursor pointing just past a tip"""
+    raw = json.dumps({"t": tip["timestamp"].isoformat(), "id": tip["id"]}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_tips_cursor(cursor: str) -> dict:
+    """Turn a keyset cursor back into a filter for the next (older) page"""
+    try:
+        raw = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        timestamp = datetime.fromisoformat(raw["t"])
+        tip_id = str(raw["id"])
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+    return {"$or": [
+        {"timestamp": {"$lt": timestamp}},
+        {"timestamp": timestamp, "id": {"$lt": tip_id}}
+    ]}
+
+async def fetch_tips_page(query: dict, limit: int, after: Optional[str]) -> Tuple[List[dict], Optional[str]]:
+    """Read one newest-first page of tips and the cursor for the next one, if any.
+
+    The hot tier holds every tip newer than those in db.tips_archive, so
+    the archive is only queried once a page runs past the end of the hot
+    tips.
+    """
+    reads = read_db("analytics")
+    sort = [("timestamp", -1), ("id", -1)]
+    tips = await reads.tips.find(
+        {**query, **decode_tips_cursor(after)} if after else query, TIP_PROJECTION
+    ).sort(sort).limit(limit + 1).to_list(limit + 1)
+    if len(tips) <= limit:
+        # Continue past the oldest hot tip; ids seen twice are mid-archival
+        archive_after = encode_tips_cursor(tips[-1]) if tips else after
+        archive_query = {**query, **decode_tips_cursor(archive_after)} if archive_after else query
+        remaining = limit + 1 - len(tips)
+        seen = {tip["id"] for tip in tips}
+        archived = await reads.tips_archive.find(archive_query, TIP_PROJECTION).sort(sort).limit(remaining).to_list(remaining)
+        tips.extend(tip for tip in archived if tip["id"] not in seen)
+    if len(tips) > limit:
+        tips = tips[:limit]
+        return tips, encode_tips_cursor(tips[-1])
+    return tips, None
+
+async def tips_page_response(query: dict, limit: int, after: Optional[str]) -> ORJSONResponse:
+    """Serve one newest-first page of tips, setting X-Next-Cursor when more remain.
+
+    Documents are projected to the TipRecord fields and encoded straight
+    to JSON, skipping per-row model construction and response_model
+    re-validation.
+    """
+    tips, next_cursor = await fetch_tips_page(query, limit, after)
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+    return ORJSONResponse(content=tips, headers=headers)
+
+DUPLICATE_KEY_ERROR = 11000
+
+async def find_tips_by_signature(collection, signatures: List[str]) -> Dict[str, dict]:
+    """Map every signature stored in one tip tier to its tip"""
+    if not signatures:
+        return {}
+    return {tip["signature"]: tip async for tip in collection.find({"signature": {"$in": signatures}}, STORED_TIP_PROJECTION)}
+
+async def count_tips(collection, tips: List[dict]):
+    """Update stats, rollups and leaderboards for tips stored as applied.
+
+    If that fails the tips are marked unapplied, so the client's retry,
+    which is a replay, counts them instead of returning the stored tip.
+    """
+    if not tips:
+        return
+    try:
+        await tip_stats.apply_tips(db, tips)
+    except Exception:
+        await collection.update_many(
+            {"signature": {"$in": [tip["signature"] for tip in tips]}},
+            {"$set": {"applied": False}}
+        )
+        raise
+
+async def claim_unapplied_tips(collection, tips: List[dict]) -> List[dict]:
+    """Claim replayed tips whose counters were never updated, so only one request counts each"""
+    claims = await asyncio.gather(*(
+        collection.find_one_and_update(
+            {"signature": tip["signature"], "applied": False},
+            {"$set": {"applied": True}},
+            projection=TIP_PROJECTION
+        )
+        for tip in tips if tip.get("applied") is False
+    ))
+    return [tip for tip in claims if tip]
+
+async def insert_tip_records(records: List[dict], collection=None) -> Tuple[Dict[int, str], Dict[int, dict]]:
+    """Insert tips with one unordered insert_many and update channel totals.
+
+    Tips are unique on their transaction signature across both tiers, and
+    a replay of a hot tip whose counters failed counts it. Returns two
+    maps keyed by position in records: the error message for every record
+    that failed, and the already stored tip for every record that was a
+    replay.
+    """
+    if not records:
+        return {}, {}
+    collection = collection if collection is not None else db.tips
+    failed_writes = {}
+    try:
+        await collection.insert_many([{**record, "applied": True} for record in records], ordered=False)
+    except BulkWriteError as e:
+        failed_writes = {error["index"]: error for error in e.details.get("writeErrors", [])}
+    
+    replays = {}
+    duplicates = [position for position, error in failed_writes.items() if error["code"] == DUPLICATE_KEY_ERROR]
+    if duplicates:
+        signatures = [records[position]["signature"] for position in duplicates]
+        hot = await find_tips_by_signature(db.tips, signatures)
+        # The stored tip may have been archived since the insert was rejected
+        missing = [signature for signature in signatures if signature not in hot]
+        existing = {**hot, **await find_tips_by_signature(db.tips_archive, missing)}
+        for position in duplicates:
+            if records[position]["signature"] in existing:
+                replays[position] = existing[records[position]["signature"]]
+                del failed_writes[position]
+    
+    inserted = [position for position in range(len(records)) if position not in failed_writes and position not in replays]
+    # The unique index only covers the hot tier, so a replay of an archived
+    # tip is inserted; the tiering job copies before it deletes, so the
+    # archived tip is always visible here and the new row is taken back out
+    archived = await find_tips_by_signature(db.tips_archive, [records[position]["signature"] for position in inserted])
+    if archived:
+        await collection.delete_many({"id": {"$in": [
+            records[position]["id"] for position in inserted if records[position]["signature"] in archived
+        ]}})
+        for position in inserted:
+            if records[position]["signature"] in archived:
+                replays[position] = archived[records[position]["signature"]]
+    
+    recorded = [records[position] for position in inserted if position not in replays]
+    if duplicates:
+        recorded.extend(await claim_unapplied_tips(collection, list(hot.values())))
+    await count_tips(collection, recorded)
+    publish_tips(recorded)
+    return {position: error["errmsg"] for position, error in failed_writes.items()}, replays
+
+async def flush_tip_group(records: List[dict]) -> List[Any]:
+    """Commit one group of queued tips with a journaled write"""
+    failed_writes, replays = await insert_tip_records(
+        records,
+        collection=db.tips.with_options(write_concern=WriteConcern(j=True))
+    )
+    return [
+        HTTPException(status_code=500, detail=f"Failed to record tip: {failed_writes[position]}")
+        if position in failed_writes else replays.get(position, record)
+        for position, record in enumerate(records)
+    ]
+
+# Tips per worker bus message, keeping each datagram well under the socket limit
+TIP_BUS_CHUNK = 100
+
+def publish_tips(records: List[dict]):
+    """Push newly recorded tips to live feed subscribers of their channel and wallet, on every worker"""
+    events = []
+    for record in records:
+        data = orjson.dumps({field: record[field] for field in TIP_FIELDS})
+        event = b"event: tip\nid: " + record["id"].encode() + b"\ndata: " + data + b"\n\n"
+        topics = (f"channel:{record['channelId']}", f"wallet:{record['toWallet']}")
+        tip_feed.publish(topics, event)
+        events.append((topics, event.decode()))
+    for start in range(0, len(events), TIP_BUS_CHUNK):
+        worker_bus.publish("tips", events[start:start + TIP_BUS_CHUNK])
+
+def deliver_worker_tips(events: List[list]):
+    """Hand tips recorded by another worker to this worker's feed subscribers"""
+    for topics, event in events:
+        tip_feed.publish(topics, event.encode())
+
+async def stream_tip_feed(request: Request, subscription) -> Any:
+    """Yield Server-Sent Events for one feed subscription until the client leaves or falls behind"""
+    try:
+        yield b"retry: 3000\n\n"
+        while True:
+            events = await subscription.next_batch(FEED_HEARTBEAT_SECONDS)
+            if subscription.evicted:
+                # Too far behind; the client reconnects and backfills from /api/tips
+                yield b"event: evicted\ndata: {}\n\n"
+                return
+            if events is None:
+                if await request.is_disconnected():
+                    return
+                yield b": keep-alive\n\n"
+                continue
+            yield b"".join(events)
+    finally:
+        tip_feed.unsubscribe(subscription)
+
+def tip_feed_response(request: Request, topic: str) -> StreamingResponse:
+    """Open a live tip stream for a topic, refusing it when the feed is at capacity"""
+    try:
+        subscription = tip_feed.subscribe(topic)
+    except FeedFullError:
+        raise HTTPException(status_code=503, detail="Too many live feeds open, retry shortly")
+    return StreamingResponse(
+        stream_tip_feed(request, subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+TIP_REPLAY_CONFLICT = "A different tip was already recorded with this signature"
+
+def tip_replay_conflicts(stored: dict, record: dict) -> bool:
+    """Whether a replayed signature carries a different payload than the stored tip"""
+    return any(stored[field] != record[field] for field in ("fromWallet", "toWallet", "channelId", "amount"))
+
+def check_tip_replay(stored: dict, record: dict):
+    """Reject a replayed signature whose payload differs from the stored tip"""
+    if tip_replay_conflicts(stored, record):
+        raise HTTPException(status_code=409, detail=TIP_REPLAY_CONFLICT)
+
+def check_wallet_rate(request: Request, route: str, wallet_address: str):
+    """Spend a token from a wallet's budget for a route, or fail with 429.
+
+    Wallets in requests are unverified, so the bucket is shared with the
+    client address too: nobody can spend another client's budget by
+    naming their wallet.
+    """
+    budget = RATE_LIMITS.get(route, RATE_LIMITS["default"])
+    if not RATE_LIMITING or not budget:
+        return
+    client_host = request.client.host if request.client else None
+    retry_after = rate_limiter.acquire((route, "wallet", wallet_address, client_host), budget)
+    if retry_after:
+        metrics.http_requests_rejected_total.labels(route, "wallet").inc()
+        raise HTTPException(
+            status_code=429,
+            detail="Rate limit exceeded for this wallet",
+            headers={"Retry-After": str(math.ceil(retry_after))}
+        )
+
+def evict_cached_creator(wallet_address: str, channel_ids: List[str]):
+    """Drop this worker's cached lookups for a creator"""
+    keys = [("walletAddress", wallet_address)]
+    keys.extend(("channelId", channel_id) for channel_id in channel_ids)
+    creator_cache.invalidate(*keys)
+    creator_cache.invalidate_where(lambda creator: creator is not None and creator["walletAddress"] == wallet_address)
+
+def invalidate_creator_cache(wallet_address: str, *channel_ids: Optional[str]):
+    """Drop cached lookups for a creator after a write, on every worker"""
+    channel_ids = [channel_id for channel_id in channel_ids if channel_id]
+    evict_cached_creator(wallet_address, channel_ids)
+    worker_bus.publish("creator", {"wallet": wallet_address, "channels": channel_ids})
+
+async def release_channel_key(channel_id: str, wallet_address: str):
+    """Take a channel id off the creator who connected it before switching to another channel.
+
+    Their tips stay recorded under it. If it was their canonical id, their
+    new tips are recorded under their current YouTube channel instead.
+    """
+    previous = await db.creators.find_one(
+        {"channelKeys": channel_id, "walletAddress": {"$ne": wallet_address}},
+        {"_id": 0, "walletAddress": 1, "canonicalChannelId": 1, "channelId": 1, "youtubeChannelId": 1, "channelKeys": 1}
+    )
+    if not previous:
+        return
+    update = {"$pull": {"channelKeys": channel_id}}
+    if canonical_channel_id(previous) == channel_id:
+        update["$set"] = {"canonicalChannelId": previous.get("youtubeChannelId")}
+    await db.creators.update_one({"walletAddress": previous["walletAddress"]}, update)
+    invalidate_creator_cache(previous["walletAddress"], *previous["channelKeys"])
+
+def add_channel_ids(*channel_ids: str):
+    """Record newly registered channel ids in the membership index of every worker"""
+    channel_index.add(*channel_ids)
+    worker_bus.publish("channels", list(channel_ids))
+
 # YouTube OAuth Endpoints
 @api_router.get("/oauth/youtube/initiate")
 async def initiate_youtube_oauth(request: Request, wallet_address: str = Query(...)):
     """Initiate YouTube OAuth flow"""
+    check_wallet_rate(request, "/api/oauth/youtube/initiate", wallet_address)
     try:
         flow = create_oauth_flow()
         
@@ -155,7 +746,7 @@ async def youtube_oauth_callback(request: Request, code: str = Query(...), state
         
         # Exchange code for tokens
         flow = create_oauth_flow()
-        flow.fetch_token(code=code)
+        await run_google_call(flow.fetch_token, code=code, timeout=GOOGLE_API_TIMEOUT)
         
         credentials = flow.credentials
         
@@ -164,15 +755,27 @@ async def youtube_oauth_callback(request: Request, code: str = Query(...), state
         
         # Check if this YouTube channel is already connected to another wallet
         existing_channel = await db.creators.find_one({
-            "youtubeChannelId": channel_info['channelId'],
+            "$or": [{"youtubeChannelId": channel_info['channelId']}, {"channelId": channel_info['channelId']}],
             "walletAddress": {"$ne": wallet_address}
-        })
+        }, {"_id": 1})
         
         if existing_channel:
             raise HTTPException(status_code=400, detail="This YouTube channel is already connected to another wallet")
         
+        await release_channel_key(channel_info['channelId'], wallet_address)
+        
+        current = await db.creators.find_one(
+            {"walletAddress": wallet_address},
+            {"_id": 0, "canonicalChannelId": 1, "channelId": 1, "youtubeChannelId": 1}
+        )
+        
+        # An existing creator keeps the id their tips are recorded under
+        canonical = canonical_channel_id(current) if current else channel_info['channelId']
+        
         # Update creator record
         creator_data = {
+            "canonicalChannelId": canonical,
+            "channelKeys": channel_keys(canonical, (current or {}).get("channelId"), channel_info['channelId']),
             "youtubeChannelId": channel_info['channelId'],
             "youtubeChannelName": channel_info['channelName'],
             "youtubeAccessToken": credentials.token,
@@ -187,6 +790,8 @@ async def youtube_oauth_callback(request: Request, code: str = Query(...), state
             {"$set": creator_data},
             upsert=True
         )
+        add_channel_ids(channel_info['channelId'])
+        invalidate_creator_cache(wallet_address, *creator_data["channelKeys"])
         
         # Clear session data
         request.session.pop('wallet_address', None)
@@ -204,16 +809,18 @@ async def youtube_oauth_callback(request: Request, code: str = Query(...), state
 
 # Creator Registration Endpoints (Updated)
 @api_router.post("/register", response_model=CreatorResponse)
-async def register_creator(registration: CreatorRegistration):
+async def register_creator(request: Request, registration: CreatorRegistration):
     """Register a creator's wallet address with their YouTube channel ID (Legacy endpoint)"""
     
+    check_wallet_rate(request, "/api/register", registration.walletAddress)
+    
     # Check if channel is already registered
-    existing = await db.creators.find_one({"channelId": registration.channelId})
+    existing = await db.creators.find_one({"channelKeys": registration.channelId}, {"_id": 1})
     if existing:
         raise HTTPException(status_code=400, detail="Channel already registered")
     
     # Check if wallet is already registered
-    existing_wallet = await db.creators.find_one({"walletAddress": registration.walletAddress})
+    existing_wallet = await db.creators.find_one({"walletAddress": registration.walletAddress}, {"_id": 1})
     if existing_wallet:
         raise HTTPException(status_code=400, detail="Wallet already registered with another channel")
     
@@ -222,40 +829,101 @@ async def register_creator(registration: CreatorRegistration):
         walletAddress=registration.walletAddress
     )
     
-    await db.creators.insert_one(creator_data.dict())
+    await db.creators.insert_one({
+        **creator_data.dict(),
+        "canonicalChannelId": registration.channelId,
+        "channelKeys": channel_keys(registration.channelId)
+    })
+    add_channel_ids(registration.channelId)
+    invalidate_creator_cache(registration.walletAddress, registration.channelId)
     return creator_data
 
 @api_router.get("/creator")
-async def get_creator_by_channel(channelId: Optional[str] = None, walletAddress: Optional[str] = None):
+async def get_creator_by_channel(request: Request, channelId: Optional[str] = None, walletAddress: Optional[str] = None):
     """Get creator info by channel ID or wallet address"""
     
     if channelId:
-        creator = await db.creators.find_one({"$or": [
-            {"channelId": channelId},
-            {"youtubeChannelId": channelId}
-        ]})
+        creator = await lookup_creator("channelId", channelId)
     elif walletAddress:
-        creator = await db.creators.find_one({"walletAddress": walletAddress})
+        check_wallet_rate(request, "/api/creator", walletAddress)
+        creator = await lookup_creator("walletAddress", walletAddress)
     else:
         raise HTTPException(status_code=400, detail="Either channelId or walletAddress is required")
     
     if not creator:
         raise HTTPException(status_code=404, detail="Creator not found")
     
+    # Served from the lookup cache, so a revalidation usually costs no Mongo read
+    return cached_response(request, creator, creator_etag(creator), CREATOR_MAX_AGE)
+
+@api_router.post("/creators/batch")
+async def get_creators_batch(lookup: CreatorBatchLookup):
+    """Resolve many channel IDs and/or wallet addresses in one request"""
+    
+    channel_ids = list(dict.fromkeys(lookup.channelIds))
+    wallet_addresses = list(dict.fromkeys(lookup.walletAddresses))
+    if not channel_ids and not wallet_addresses:
+        raise HTTPException(status_code=400, detail="Either channelIds or walletAddresses is required")
+    if len(channel_ids) + len(wallet_addresses) > MAX_BATCH_LOOKUP:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_LOOKUP} ids can be looked up per request")
+    
+    not_cached = object()
+    found = {"channelId": {}, "walletAddress": {}}
+    missing = {"channelId": [], "walletAddress": []}
+    for field, values in (("channelId", channel_ids), ("walletAddress", wallet_addresses)):
+        for value in values:
+            if field == "channelId" and not channel_index.might_contain(value):
+                found[field][value] = None
+                continue
+            cached = creator_cache.peek((field, value), default=not_cached)
+            if cached is not_cached:
+                missing[field].append(value)
+            else:
+                found[field][value] = cached
+    
+    if missing["channelId"] or missing["walletAddress"]:
+        generation = creator_cache.generation
+        creators = read_db("lookup").creators
+        
+        async def find_creators(field: str, values: List[str]) -> List[dict]:
+            if not values:
+                return []
+            return await creators.find({field: {"$in": values}}, {**CREATOR_PROJECTION, "channelKeys": 1}).to_list(len(values))
+        
+        # Two equality lookups, each served by its own index, instead of one $or
+        by_channel, by_wallet = await asyncio.gather(
+            find_creators("channelKeys", missing["channelId"]),
+            find_creators("walletAddress", missing["walletAddress"])
+        )
+        
+        by_key = {}
+        for creator in by_channel + by_wallet:
+            view = creator_public_view(creator)
+            for channel_id in creator.get("channelKeys", ()):
+                by_key[("channelId", channel_id)] = view
+            by_key[("walletAddress", creator["walletAddress"])] = view
+        
+        for field, values in missing.items():
+            for value in values:
+                creator = by_key.get((field, value))
+                found[field][value] = creator
+                creator_cache.put((field, value), creator, generation=generation)
+    
     return {
-        "channelId": creator.get("youtubeChannelId") or creator.get("channelId"),
-        "channelName": creator.get("youtubeChannelName"),
-        "walletAddress": creator["walletAddress"],
-        "defaultTipAmount": creator.get("defaultTipAmount", 0.1),
-        "youtubeConnected": creator.get("youtubeConnected", False),
-        "registeredAt": creator.get("registeredAt")
+        "channelIds": {channel_id: found["channelId"][channel_id] for channel_id in channel_ids},
+        "walletAddresses": {wallet: found["walletAddress"][wallet] for wallet in wallet_addresses}
     }
 
 @api_router.put("/creator/settings")
-async def update_creator_settings(settings: CreatorSettings, wallet_address: str = Query(...)):
+async def update_creator_settings(request: Request, settings: CreatorSettings, wallet_address: str = Query(...)):
     """Update creator settings like default tip amount"""
     
-    creator = await db.creators.find_one({"walletAddress": wallet_address})
+    check_wallet_rate(request, "/api/creator/settings", wallet_address)
+    
+    creator = await db.creators.find_one(
+        {"walletAddress": wallet_address},
+        {"_id": 0, "canonicalChannelId": 1, "channelId": 1, "youtubeChannelId": 1}
+    )
     if not creator:
         raise HTTPException(status_code=404, detail="Creator not found")
     
@@ -264,19 +932,24 @@ async def update_creator_settings(settings: CreatorSettings, wallet_address: str
         {"walletAddress": wallet_address},
         {"$set": {"defaultTipAmount": settings.defaultTipAmount}}
     )
+    invalidate_creator_cache(wallet_address, creator.get("canonicalChannelId"), creator.get("channelId"), creator.get("youtubeChannelId"))
     
     return {"message": "Settings updated successfully", "defaultTipAmount": settings.defaultTipAmount}
 
 # Tip Recording Endpoints (Updated)
 @api_router.post("/tip", response_model=TipRecord)
-async def record_tip(tip: TipRecordCreate):
-    """Record a successful tip transaction"""
+async def record_tip(request: Request, tip: TipRecordCreate):
+    """Record a successful tip transaction.
+
+    Idempotent on the transaction signature: a replay returns the tip that
+    was recorded first instead of creating a duplicate.
+    """
     
-    # Verify the channel exists (check both old and new format)
-    creator = await db.creators.find_one({"$or": [
-        {"channelId": tip.channelId},
-        {"youtubeChannelId": tip.channelId}
-    ]})
+    # Verify the channel exists under either of its ids
+    creator = await db.creators.find_one(
+        {"channelKeys": tip.channelId},
+        {"_id": 0, "walletAddress": 1, "canonicalChannelId": 1, "channelId": 1, "youtubeChannelId": 1}
+    )
     
     if not creator:
         raise HTTPException(status_code=404, detail="Channel not registered")
@@ -285,58 +958,344 @@ async def record_tip(tip: TipRecordCreate):
     if creator["walletAddress"] != tip.toWallet:
         raise HTTPException(status_code=400, detail="Wallet address mismatch")
     
-    tip_record = TipRecord(**tip.dict())
-    await db.tips.insert_one(tip_record.dict())
+    # Only tips that passed validation spend from the tipper's budget
+    check_wallet_rate(request, "/api/tip", tip.fromWallet)
+    
+    # Tips are always recorded under the canonical id so stats see every one
+    record = TipRecord(**{**tip.dict(), "channelId": canonical_channel_id(creator)}).dict()
+    if TIP_GROUP_COMMIT:
+        try:
+            stored = await tip_commit_queue.submit(record)
+        except QueueFullError:
+            raise HTTPException(status_code=503, detail="Tip queue is full, retry shortly")
+    else:
+        # Insert unless the signature is already recorded, in one round trip
+        try:
+            stored = await db.tips.find_one_and_update(
+                {"signature": record["signature"]},
+                {"$setOnInsert": {**record, "applied": True}},
+                projection=STORED_TIP_PROJECTION,
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            # A concurrent request with the same signature won the upsert
+            stored = (
+                await db.tips.find_one({"signature": record["signature"]}, STORED_TIP_PROJECTION)
+                or await db.tips_archive.find_one({"signature": record["signature"]}, TIP_PROJECTION)
+            )
+        if stored["id"] == record["id"]:
+            # A replay of a tip that has since moved to the archive tier
+            archived = await db.tips_archive.find_one({"signature": record["signature"]}, TIP_PROJECTION)
+            if archived:
+                await db.tips.delete_one({"id": record["id"]})
+                stored = archived
+            else:
+                await count_tips(db.tips, [record])
+                publish_tips([record])
+        else:
+            # The first attempt stored the tip but failed to count it
+            claimed = await claim_unapplied_tips(db.tips, [stored])
+            await count_tips(db.tips, claimed)
+            publish_tips(claimed)
+    
+    if stored["id"] != record["id"]:
+        check_tip_replay(stored, record)
+    return TipRecord(**stored)
+
+@api_router.post("/tips/batch")
+async def record_tips_batch(batch: TipBatch):
+    """Record many tip transactions at once, e.g. for backfills and replays"""
+    
+    if len(batch.tips) > MAX_TIP_BATCH:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_TIP_BATCH} tips can be recorded per request")
+    
+    results: List[Dict[str, Any]] = [None] * len(batch.tips)
+    valid = []
+    for index, item in enumerate(batch.tips):
+        try:
+            valid.append((index, TipRecordCreate(**item)))
+        except ValidationError as e:
+            message = "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+            results[index] = {"index": index, "status": "error", "error": message}
+    
+    # Resolve every target channel with a single query
+    channel_ids = list({tip.channelId for _, tip in valid if channel_index.might_contain(tip.channelId)})
+    channels = {}
+    if channel_ids:
+        cursor = db.creators.find(
+            {"channelKeys": {"$in": channel_ids}},
+            {"_id": 0, "channelKeys": 1, "canonicalChannelId": 1, "channelId": 1, "youtubeChannelId": 1, "walletAddress": 1}
+        )
+        async for creator in cursor:
+            for channel_id in creator.get("channelKeys", ()):
+                channels[channel_id] = creator
+    
+    records = []
+    for index, tip in valid:
+        creator = channels.get(tip.channelId)
+        if creator is None:
+            results[index] = {"index": index, "status": "error", "error": "Channel not registered"}
+        elif creator["walletAddress"] != tip.toWallet:
+            results[index] = {"index": index, "status": "error", "error": "Wallet address mismatch"}
+        else:
+            records.append((index, TipRecord(**{**tip.dict(), "channelId": canonical_channel_id(creator)}).dict()))
     
-    return tip_record
+    failed_writes, replays = await insert_tip_records([record for _, record in records])
+    
+    inserted = duplicates = 0
+    for position, (index, record) in enumerate(records):
+        if position in failed_writes:
+            results[index] = {"index": index, "status": "error", "error": failed_writes[position]}
+        elif position in replays and tip_replay_conflicts(replays[position], record):
+            # POST /api/tip answers 409 for the same case
+            results[index] = {"index": index, "status": "conflict", "error": TIP_REPLAY_CONFLICT, "id": replays[position]["id"]}
+        elif position in replays:
+            results[index] = {"index": index, "status": "duplicate", "id": replays[position]["id"]}
+            duplicates += 1
+        else:
+            results[index] = {"index": index, "status": "ok", "id": record["id"]}
+            inserted += 1
+    
+    return {
+        "inserted": inserted,
+        "duplicates": duplicates,
+        "failed": len(batch.tips) - inserted - duplicates,
+        "results": results
+    }
 
 @api_router.get("/tips/{channelId}", response_model=List[TipRecord])
-async def get_tips_for_channel(channelId: str, limit: int = 50):
-    """Get recent tips for a channel"""
+async def get_tips_for_channel(
+    channelId: str,
+    limit: int = Query(50, ge=1, le=MAX_TIPS_PAGE),
+    after: Optional[str] = None
+):
+    """Get recent tips for a channel, paged with the X-Next-Cursor header"""
     
-    tips = await db.tips.find({"channelId": channelId}).sort("timestamp", -1).limit(limit).to_list(limit)
-    return [TipRecord(**tip) for tip in tips]
+    return await tips_page_response({"channelId": await resolve_channel_id(channelId)}, limit, after)
 
 @api_router.get("/tips/wallet/{walletAddress}", response_model=List[TipRecord])
-async def get_tips_for_wallet(walletAddress: str, limit: int = 50):
-    """Get recent tips received by a wallet"""
+async def get_tips_for_wallet(
+    walletAddress: str,
+    limit: int = Query(50, ge=1, le=MAX_TIPS_PAGE),
+    after: Optional[str] = None
+):
+    """Get recent tips received by a wallet, paged with the X-Next-Cursor header"""
     
-    tips = await db.tips.find({"toWallet": walletAddress}).sort("timestamp", -1).limit(limit).to_list(limit)
-    return [TipRecord(**tip) for tip in tips]
+    return await tips_page_response({"toWallet": walletAddress}, limit, after)
+
+@api_router.get("/feed/tips/{channelId}")
+async def get_channel_tip_feed(request: Request, channelId: str):
+    """Stream tips for a channel as they are recorded, as Server-Sent Events"""
+    
+    creator = await lookup_creator("channelId", channelId)
+    if not creator:
+        raise HTTPException(status_code=404, detail="Channel not registered")
+    
+    return tip_feed_response(request, f"channel:{creator['channelId']}")
+
+@api_router.get("/feed/tips/wallet/{walletAddress}")
+async def get_wallet_tip_feed(request: Request, walletAddress: str):
+    """Stream tips received by a wallet as they are recorded, as Server-Sent Events"""
+    
+    return tip_feed_response(request, f"wallet:{walletAddress}")
+
+async def export_tip_tiers(query: dict):
+    """Yield matching tips oldest first, from the archive and then the hot tier"""
+    reads = read_db("analytics")
+    sort = [("timestamp", 1), ("id", 1)]
+    last = None
+    async for tip in reads.tips_archive.find(query, TIP_PROJECTION).sort(sort).batch_size(EXPORT_BATCH_SIZE):
+        last = tip
+        yield tip
+    
+    # Resume strictly after the newest archived tip so one mid-archival is not exported twice
+    if last is not None:
+        query = {"$and": [query, {"$or": [
+            {"timestamp": {"$gt": last["timestamp"]}},
+            {"timestamp": last["timestamp"], "id": {"$gt": last["id"]}}
+        ]}]}
+    async for tip in reads.tips.find(query, TIP_PROJECTION).sort(sort).batch_size(EXPORT_BATCH_SIZE):
+        yield tip
+
+async def stream_tips_export(query: dict, export_format: str):
+    """Yield exported tips in chunks straight off the Mongo cursors of both tiers"""
+    cursor = export_tip_tiers(query)
+    
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if export_format == "csv" else None
+    if writer:
+        writer.writerow(TIP_FIELDS)
+    
+    rows = 0
+    async for tip in cursor:
+        if writer:
+            tip["timestamp"] = tip["timestamp"].isoformat()
+            writer.writerow([tip.get(field) for field in TIP_FIELDS])
+        else:
+            buffer.write(orjson.dumps(tip).decode())
+            buffer.write("\n")
+        rows += 1
+        if rows % 500 == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+@api_router.get("/export/tips")
+async def export_tips(
+    channelId: Optional[str] = None,
+    walletAddress: Optional[str] = None,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None
+):
+    """Stream the full tip history of a channel or wallet as NDJSON or CSV"""
+    
+    if channelId:
+        query = {"channelId": await resolve_channel_id(channelId)}
+        name = channelId
+    elif walletAddress:
+        query = {"toWallet": walletAddress}
+        name = walletAddress
+    else:
+        raise HTTPException(status_code=400, detail="Either channelId or walletAddress is required")
+    
+    if since or until:
+        query["timestamp"] = {}
+        if since:
+            query["timestamp"]["$gte"] = since
+        if until:
+            query["timestamp"]["$lt"] = until
+    
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        stream_tips_export(query, format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="tips-{name}.{format}"'}
+    )
 
 # Stats Endpoints (Updated)
 @api_router.get("/stats/{channelId}")
-async def get_channel_stats(channelId: str):
+async def get_channel_stats(request: Request, channelId: str):
     """Get statistics for a channel"""
     
-    creator = await db.creators.find_one({"$or": [
-        {"channelId": channelId},
-        {"youtubeChannelId": channelId}
-    ]})
-    
+    creator = await lookup_creator("channelId", channelId)
     if not creator:
         raise HTTPException(status_code=404, detail="Channel not registered")
     
-    # Count total tips
-    total_tips = await db.tips.count_documents({"channelId": channelId})
+    # Revalidate against the version counter alone before reading the totals
+    if request.headers.get("if-none-match"):
+        version = await tip_stats.get_stats_version(read_db("analytics"), creator["channelId"])
+        etag = stats_etag(creator, version)
+        if etag_matches(request, etag):
+            return cached_response(request, None, etag, STATS_MAX_AGE)
     
-    # Sum total amount
-    pipeline = [
-        {"$match": {"channelId": channelId}},
-        {"$group": {"_id": None, "total": {"$sum": "$amount"}}}
-    ]
-    result = await db.tips.aggregate(pipeline).to_list(1)
-    total_amount = result[0]["total"] if result else 0
+    # Running totals are maintained by record_tip, so this is a single read
+    stats = await tip_stats.get_stats(read_db("analytics"), creator["channelId"])
     
-    return {
+    return cached_response(request, {
         "channelId": channelId,
-        "channelName": creator.get("youtubeChannelName"),
-        "totalTips": total_tips,
-        "totalAmount": total_amount,
-        "defaultTipAmount": creator.get("defaultTipAmount", 0.1),
+        "channelName": creator["channelName"],
+        "totalTips": stats["totalTips"],
+        "totalAmount": stats["totalAmount"],
+        "minAmount": stats["minAmount"],
+        "maxAmount": stats["maxAmount"],
+        "lastTipAt": stats["lastTipAt"],
+        "defaultTipAmount": creator["defaultTipAmount"],
         "walletAddress": creator["walletAddress"]
+    }, stats_etag(creator, stats["version"]), STATS_MAX_AGE)
+
+@api_router.get("/stats/{channelId}/timeseries")
+async def get_channel_timeseries(
+    channelId: str,
+    granularity: str = Query("day", pattern="^(hour|day)$"),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None
+):
+    """Get hourly or daily tip counts, sums and unique tippers for a channel"""
+    
+    end = to_naive_utc(end) or datetime.utcnow()
+    start = to_naive_utc(start) or end - (timedelta(days=1) if granularity == "hour" else timedelta(days=30))
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    step = timedelta(hours=1) if granularity == "hour" else timedelta(days=1)
+    if (end - start) / step > MAX_TIMESERIES_BUCKETS:
+        raise HTTPException(status_code=400, detail=f"Range spans more than {MAX_TIMESERIES_BUCKETS} buckets")
+    
+    series = await tip_stats.get_timeseries(read_db("analytics"), await resolve_channel_id(channelId), granularity, start, end)
+    return {"channelId": channelId, "granularity": granularity, "start": start, "end": end, "buckets": series}
+
+# Dashboard Endpoint
+@api_router.get("/dashboard/{walletAddress}")
+async def get_creator_dashboard(request: Request, walletAddress: str, limit: int = Query(10, ge=1, le=MAX_TIPS_PAGE)):
+    """Get a creator's profile, tip stats and first page of recent tips in one request"""
+    
+    check_wallet_rate(request, "/api/dashboard/{walletAddress}", walletAddress)
+    
+    async def profile_and_stats():
+        creator = await lookup_creator("walletAddress", walletAddress)
+        if not creator:
+            return None, None
+        return creator, await tip_stats.get_stats(read_db("analytics"), creator["channelId"])
+    
+    # Recent tips are keyed by wallet too, so they load alongside the profile -> stats chain
+    (creator, stats), (tips, next_cursor) = await asyncio.gather(
+        profile_and_stats(),
+        fetch_tips_page({"toWallet": walletAddress}, limit, None)
+    )
+    if not creator:
+        raise HTTPException(status_code=404, detail="Creator not found")
+    
+    return ORJSONResponse(content={
+        "creator": creator,
+        "stats": {field: stats[field] for field in tip_stats.STATS_FIELDS},
+        "recentTips": tips,
+        "nextCursor": next_cursor
+    })
+
+# Leaderboard Endpoints
+@api_router.get("/leaderboard/channels")
+async def get_top_channels(
+    window: str = Query("week", pattern="^(day|week|all)$"),
+    limit: int = Query(10, ge=1, le=100)
+):
+    """Get the channels that received the most tips today, this week or all time"""
+    
+    entries = await tip_stats.get_leaderboard(read_db("analytics"), "channels", "", window, limit, datetime.utcnow())
+    return {"window": window, "channels": entries}
+
+@api_router.get("/leaderboard/supporters/{channelId}")
+async def get_top_supporters(
+    channelId: str,
+    window: str = Query("all", pattern="^(day|week|all)$"),
+    limit: int = Query(10, ge=1, le=100)
+):
+    """Get the wallets that tipped a channel the most today, this week or all time"""
+    
+    entries = await tip_stats.get_leaderboard(
+        read_db("analytics"), "supporters", await resolve_channel_id(channelId), window, limit, datetime.utcnow()
+    )
+    return {"channelId": channelId, "window": window, "supporters": entries}
+
+# Cache Endpoints
+@api_router.get("/cache/stats")
+async def get_cache_stats():
+    """Get counters for the in-process lookup cache, channel index, tip queue, live feed and worker bus"""
+    return {
+        "creatorLookup": creator_cache.stats(),
+        "channelIndex": channel_index.stats(),
+        "tipGroupCommit": tip_commit_queue.stats(),
+        "tipFeed": tip_feed.stats(),
+        "workerBus": worker_bus.stats()
     }
 
+@api_router.get("/metrics")
+async def get_metrics():
+    """Expose request, MongoDB and cache metrics in Prometheus text format"""
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
+
 # Health check
 @api_router.get("/")
 async def root():
@@ -354,14 +1313,29 @@ async def health_check():
 # Include the router in the main app
 app.include_router(api_router)
 
+# Inside CORS so rejections still carry CORS headers the extension can read
+app.add_middleware(
+    AdmissionMiddleware,
+    routes_provider=lambda: app.router.routes,
+    limiter=rate_limiter,
+    budgets=RATE_LIMITS if RATE_LIMITING else {},
+    default_budget=RATE_LIMITS["default"] if RATE_LIMITING else None,
+    max_in_flight=MAX_IN_FLIGHT,
+    exempt_prefixes=("/api/health", "/api/metrics", "/api/feed/")
+)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Retry-After"],
 )
 
+# Outermost middleware so latency covers the whole stack
+app.add_middleware(metrics.MetricsMiddleware, routes_provider=lambda: app.router.routes)
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -373,18 +1347,33 @@ logger = logging.getLogger(__name__)
 async def startup_event():
     logger.info("Amplify API v2.0 starting up...")
     
-    # Create indexes for better performance
-    await db.creators.create_index("channelId", unique=True, sparse=True)
-    await db.creators.create_index("youtubeChannelId", unique=True, sparse=True)
-    await db.creators.create_index("walletAddress", unique=True)
-    await db.tips.create_index("channelId")
-    await db.tips.create_index("toWallet")
-    await db.tips.create_index("timestamp")
+    # Indexes are built out of band with `python migrate.py indexes`; only
+    # verify here that they exist
+    if os.environ.get('AUTO_CREATE_INDEXES', 'false').lower() in ('1', 'true', 'yes'):
+        await migrate.create_indexes(db)
+        logger.info("Database indexes created")
+    else:
+        missing = await migrate.missing_indexes(db)
+        if missing:
+            logger.warning(
+                "Missing %d database index(es), run `python migrate.py indexes`: %s",
+                len(missing), ", ".join(f"{collection} {keys}" for collection, keys in missing)
+            )
+        else:
+            logger.info("Database indexes present")
     
-    logger.info("Database indexes created")
-    logger.info("YouTube OAuth integration ready")
+    worker_bus.start()
+    channel_index.start(db.creators)
+    if TIP_GROUP_COMMIT:
+        tip_commit_queue.start()
+        logger.info("Tip group commit enabled")
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    # Drain queued tips before the connection goes away
+    await tip_commit_queue.close()
+    await channel_index.stop()
+    worker_bus.stop()
+    google_executor.shutdown(wait=False, cancel_futures=True)
     client.close()
     logger.info("Database connection closed")
\ No newline at end of file
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""Hot/cold tiering for tips.
+
+Tips older than a cutoff are moved from db.tips into db.tips_archive,
+and their totals are folded into per-channel and per-wallet documents in
+db.tip_archive_rollups. The hot collection, and with it every index the
+API queries, then only holds recent tips. History endpoints fall through
+to the archive once the hot tier is exhausted, and reconciliation adds
+the archived rollups to the hot totals.
+
+Run it periodically, e.g. from cron:
+
+    python tip_archive.py run --older-than-days 90
+    python tip_archive.py rebuild-rollups    # recompute rollups from the archive
+"""
+import argparse
+import asyncio
+import os
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+DUPLICATE_KEY_ERROR = 11000
+
+ROLLUP_KINDS = {"channel": "channelId", "wallet": "toWallet"}
+
+
+def rollup_updates(tips: List[Dict[str, Any]]) -> List[UpdateOne]:
+    """Pre-aggregate archived tips into one upsert per channel and per wallet"""
+    totals: Dict[tuple, Dict[str, Any]] = {}
+    for tip in tips:
+        for kind, field in ROLLUP_KINDS.items():
+            entry = totals.setdefault((kind, tip[field]), {
+                "count": 0, "amount": 0,
+                "minAmount": tip["amount"], "maxAmount": tip["amount"],
+                "firstTipAt": tip["timestamp"], "lastTipAt": tip["timestamp"],
+            })
+            entry["count"] += 1
+            entry["amount"] += tip["amount"]
+            entry["minAmount"] = min(entry["minAmount"], tip["amount"])
+            entry["maxAmount"] = max(entry["maxAmount"], tip["amount"])
+            entry["firstTipAt"] = min(entry["firstTipAt"], tip["timestamp"])
+            entry["lastTipAt"] = max(entry["lastTipAt"], tip["timestamp"])
+    return [
+        UpdateOne(
+            {"kind": kind, "key": key},
+            {
+                "$inc": {"count": t["count"], "amount": t["amount"]},
+                "$min": {"minAmount": t["minAmount"], "firstTipAt": t["firstTipAt"]},
+                "$max": {"maxAmount": t["maxAmount"], "lastTipAt": t["lastTipAt"]},
+            },
+            upsert=True
+        )
+        for (kind, key), t in totals.items()
+    ]
+
+
+async def archive_tips(db, cutoff: datetime, batch_size: int = 1000) -> Dict[str, int]:
+    """Move tips older than cutoff to the archive tier in batches.
+
+    Each batch is copied into db.tips_archive under its original _id,
+    folded into the rollups, then deleted from db.tips. A tip whose _id or
+    signature is already in the archive (from an interrupted or concurrent
+    run, or a replay recorded while its original was being archived) is
+    deleted from the hot tier without being counted again, so runs are
+    safe to repeat.
+    A run cut off between the copy and the rollup update leaves the
+    rollups short; `rebuild-rollups` recomputes them.
+    """
+    moved = 0
+    batches = 0
+    while True:
+        tips = await db.tips.find({"timestamp": {"$lt": cutoff}}).sort("timestamp", 1).limit(batch_size).to_list(batch_size)
+        if not tips:
+            break
+        failed = set()
+        try:
+            await db.tips_archive.insert_many(tips, ordered=False)
+        except BulkWriteError as e:
+            for error in e.details.get("writeErrors", []):
+                if error["code"] != DUPLICATE_KEY_ERROR:
+                    raise
+                failed.add(error["index"])
+        new = [tip for position, tip in enumerate(tips) if position not in failed]
+        if new:
+            await db.tip_archive_rollups.bulk_write(rollup_updates(new), ordered=False)
+        await db.tips.delete_many({"_id": {"$in": [tip["_id"] for tip in tips]}})
+        moved += len(tips)
+        batches += 1
+    return {"moved": moved, "batches": batches}
+
+
+async def rebuild_rollups(db) -> int:
+    """Recompute every archive rollup from db.tips_archive"""
+    rebuilt = 0
+    for kind, field in ROLLUP_KINDS.items():
+        pipeline = [
+            {"$group": {
+                "_id": f"${field}",
+                "count": {"$sum": 1},
+                "amount": {"$sum": "$amount"},
+                "minAmount": {"$min": "$amount"},
+                "maxAmount": {"$max": "$amount"},
+                "firstTipAt": {"$min": "$timestamp"},
+                "lastTipAt": {"$max": "$timestamp"},
+            }},
+        ]
+        async for totals in db.tips_archive.aggregate(pipeline, allowDiskUse=True):
+            key = totals.pop("_id")
+            await db.tip_archive_rollups.replace_one({"kind": kind, "key": key}, {"kind": kind, "key": key, **totals}, upsert=True)
+            rebuilt += 1
+    return rebuilt
+
+
+async def get_archived_totals(db, kind: str, key: str) -> Optional[Dict[str, Any]]:
+    """Totals of the archived tips of one channel or wallet, None when nothing is archived"""
+    return await db.tip_archive_rollups.find_one({"kind": kind, "key": key}, {"_id": 0, "kind": 0, "key": 0})
+
+
+async def run(args) -> int:
+    load_dotenv(Path(__file__).parent / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+    try:
+        if args.command == "run":
+            cutoff = datetime.utcnow() - timedelta(days=args.older_than_days)
+            result = await archive_tips(db, cutoff, args.batch_size)
+            print(f"Archived {result['moved']} tip(s) older than {cutoff.isoformat()} in {result['batches']} batch(es)")
+            return 0
+        if args.command == "rebuild-rollups":
+            print(f"Rebuilt {await rebuild_rollups(db)} archive rollup(s)")
+            return 0
+        return 2
+    finally:
+        client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    archive = commands.add_parser("run", help="move old tips into the archive tier")
+    archive.add_argument(
+        "--older-than-days", type=float,
+        default=float(os.environ.get('TIP_ARCHIVE_AFTER_DAYS', '90')),
+        help="archive tips older than this (default $TIP_ARCHIVE_AFTER_DAYS or 90)"
+    )
+    archive.add_argument("--batch-size", type=int, default=1000)
+    commands.add_parser("rebuild-rollups", help="recompute archive rollups from the archived tips")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import asyncio
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Set
+
+
+class FeedFullError(Exception):
+    pass
+
+
+class Subscription:
+    """One consumer's bounded buffer of encoded events on a single topic"""
+
+    __slots__ = ("topic", "buffer", "evicted", "_waiter")
+
+    def __init__(self, topic: str):
+        self.topic = topic
+        self.buffer: deque = deque()
+        self.evicted = False
+        # Only exists while the consumer is parked, to keep idle subscribers small
+        self._waiter: Optional[asyncio.Future] = None
+
+    def _wake(self):
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(None)
+
+    async def next_batch(self, timeout: float) -> Optional[List[bytes]]:
+        """Wait up to timeout for events and return everything buffered, or None when idle"""
+        if not self.buffer and not self.evicted:
+            loop = asyncio.get_running_loop()
+            self._waiter = loop.create_future()
+            timer = loop.call_later(timeout, self._wake)
+            try:
+                await self._waiter
+            finally:
+                timer.cancel()
+                self._waiter = None
+            if not self.buffer and not self.evicted:
+                return None
+        events = list(self.buffer)
+        self.buffer.clear()
+        return events
+
+
+class TipFeed:
+    """In-process pub/sub fanning recorded tips out to live subscribers.
+
+    Publishing never waits on a consumer: every subscriber has a buffer of
+    at most max_buffer events, and one that falls that far behind is
+    evicted instead of slowing the publisher or growing without bound.
+    Evicted consumers are expected to reconnect and backfill through the
+    paged tip history. An idle subscriber holds an empty buffer and, while
+    parked, one future and timer; max_subscribers caps the total.
+    """
+
+    def __init__(self, max_buffer: int = 100, max_subscribers: int = 20000):
+        self.max_buffer = max_buffer
+        self.max_subscribers = max_subscribers
+        self._topics: Dict[str, Set[Subscription]] = {}
+        self.subscribers = 0
+        self.published = 0
+        self.delivered = 0
+        self.evictions = 0
+        self.rejected = 0
+
+    def subscribe(self, topic: str) -> Subscription:
+        if self.subscribers >= self.max_subscribers:
+            self.rejected += 1
+            raise FeedFullError("Too many live feed subscribers")
+        subscription = Subscription(topic)
+        self._topics.setdefault(topic, set()).add(subscription)
+        self.subscribers += 1
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscribers = self._topics.get(subscription.topic)
+        if subscribers is None or subscription not in subscribers:
+            return
+        subscribers.discard(subscription)
+        if not subscribers:
+            del self._topics[subscription.topic]
+        self.subscribers -= 1
+
+    def publish(self, topics: Iterable[str], event: bytes):
+        """Queue an already encoded event for every subscriber of the given topics"""
+        self.published += 1
+        for topic in topics:
+            for subscription in list(self._topics.get(topic, ())):
+                if len(subscription.buffer) >= self.max_buffer:
+                    self._evict(subscription)
+                    continue
+                subscription.buffer.append(event)
+                subscription._wake()
+                self.delivered += 1
+
+    def _evict(self, subscription: Subscription):
+        self.unsubscribe(subscription)
+        subscription.buffer.clear()
+        subscription.evicted = True
+        subscription._wake()
+        self.evictions += 1
+
+    def stats(self):
+        return {
+            "subscribers": self.subscribers,
+            "topics": len(self._topics),
+            "maxSubscribers": self.max_subscribers,
+            "maxBuffer": self.max_buffer,
+            "published": self.published,
+            "delivered": self.delivered,
+            "evictions": self.evictions,
+            "rejected": self.rejected,
+        }
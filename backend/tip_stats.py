@@ -0,0 +1,322 @@
+import asyncio
+import math
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from tip_archive import get_archived_totals
+
+# Totals are kept with $inc on floats, so allow for accumulated rounding
+AMOUNT_TOLERANCE = 1e-6
+
+DUPLICATE_KEY_ERROR = 11000
+
+STATS_FIELDS = ("totalTips", "totalAmount", "minAmount", "maxAmount", "lastTipAt")
+
+ROLLUP_GRANULARITIES = ("hour", "day")
+
+LEADERBOARD_WINDOWS = ("day", "week", "all")
+
+WINDOW_LENGTH = {"day": timedelta(days=1), "week": timedelta(days=7)}
+
+# Period documents are kept a little past the end of their window
+LEADERBOARD_RETENTION = {"day": timedelta(days=2), "week": timedelta(days=14)}
+
+
+def bucket_start(timestamp: datetime, granularity: str) -> datetime:
+    """Truncate a UTC timestamp to the start of its hourly or daily bucket"""
+    if granularity == "hour":
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def leaderboard_period(timestamp: datetime, window: str) -> tuple:
+    """Return the calendar period id (UTC day or ISO week) and its start for a window"""
+    if window == "day":
+        start = bucket_start(timestamp, "day")
+        return f"day:{start.date().isoformat()}", start
+    if window == "week":
+        start = bucket_start(timestamp, "day") - timedelta(days=timestamp.weekday())
+        year, week, _ = start.isocalendar()
+        return f"week:{year}-W{week:02d}", start
+    return "all", None
+
+
+async def apply_tip(db, tip: Dict[str, Any]):
+    """Fold one recorded tip into its channel's totals, rollups and leaderboards"""
+    await apply_tips(db, [tip])
+
+
+async def apply_tips(db, tips: List[Dict[str, Any]]):
+    """Fold recorded tips into running totals, time-series rollups and leaderboards.
+
+    Tips are pre-aggregated per channel, bucket and ranked member so each collection
+    gets a single bulk write however many tips are applied.
+    """
+    totals: Dict[str, Dict[str, Any]] = {}
+    buckets: Dict[tuple, Dict[str, Any]] = {}
+    for tip in tips:
+        channel = totals.setdefault(tip["channelId"], {
+            "totalTips": 0, "totalAmount": 0,
+            "minAmount": tip["amount"], "maxAmount": tip["amount"], "lastTipAt": tip["timestamp"],
+        })
+        channel["totalTips"] += 1
+        channel["totalAmount"] += tip["amount"]
+        channel["minAmount"] = min(channel["minAmount"], tip["amount"])
+        channel["maxAmount"] = max(channel["maxAmount"], tip["amount"])
+        channel["lastTipAt"] = max(channel["lastTipAt"], tip["timestamp"])
+
+        for granularity in ROLLUP_GRANULARITIES:
+            key = (tip["channelId"], granularity, bucket_start(tip["timestamp"], granularity))
+            bucket = buckets.setdefault(key, {"count": 0, "sum": 0, "tippers": {}})
+            bucket["count"] += 1
+            bucket["sum"] += tip["amount"]
+            first = bucket["tippers"].get(tip["fromWallet"])
+            bucket["tippers"][tip["fromWallet"]] = min(first, tip["timestamp"]) if first else tip["timestamp"]
+    if not totals:
+        return
+
+    stats_ops = [
+        UpdateOne(
+            {"_id": channel_id},
+            {
+                # version moves on every write so readers can tag and revalidate responses
+                "$inc": {"totalTips": t["totalTips"], "totalAmount": t["totalAmount"], "version": 1},
+                "$min": {"minAmount": t["minAmount"]},
+                "$max": {"maxAmount": t["maxAmount"], "lastTipAt": t["lastTipAt"]},
+            },
+            upsert=True
+        )
+        for channel_id, t in totals.items()
+    ]
+
+    async def update_rollups():
+        new_tippers = await record_tippers(db, {key: b["tippers"] for key, b in buckets.items()})
+        await db.tip_rollups.bulk_write([
+            UpdateOne(
+                {"channelId": channel_id, "granularity": granularity, "bucket": start},
+                {"$inc": {"count": b["count"], "sum": b["sum"], "uniqueTippers": new_tippers.get((channel_id, granularity, start), 0)}},
+                upsert=True
+            )
+            for (channel_id, granularity, start), b in buckets.items()
+        ], ordered=False)
+
+    await asyncio.gather(
+        db.channel_stats.bulk_write(stats_ops, ordered=False),
+        update_rollups(),
+        db.leaderboards.bulk_write(leaderboard_updates(tips), ordered=False),
+    )
+
+
+def leaderboard_updates(tips: List[Dict[str, Any]]) -> List[UpdateOne]:
+    """Upserts adding tips to the channel and supporter boards of every window, one per ranked member"""
+    ranks: Dict[tuple, Dict[str, Any]] = {}
+    for tip in tips:
+        for window in LEADERBOARD_WINDOWS:
+            period, start = leaderboard_period(tip["timestamp"], window)
+            for board, scope, member in (
+                ("channels", "", tip["channelId"]),
+                ("supporters", tip["channelId"], tip["fromWallet"]),
+            ):
+                rank = ranks.setdefault((board, scope, period, member), {"amount": 0, "count": 0, "start": start, "window": window})
+                rank["amount"] += tip["amount"]
+                rank["count"] += 1
+
+    ops = []
+    for (board, scope, period, member), r in ranks.items():
+        update = {"$inc": {"amount": r["amount"], "count": r["count"]}}
+        if r["window"] in LEADERBOARD_RETENTION:
+            update["$setOnInsert"] = {"expiresAt": r["start"] + LEADERBOARD_RETENTION[r["window"]] + WINDOW_LENGTH[r["window"]]}
+        ops.append(UpdateOne(
+            {"board": board, "scope": scope, "period": period, "member": member},
+            update,
+            upsert=True
+        ))
+    return ops
+
+
+async def record_tippers(db, tippers: Dict[tuple, Dict[str, datetime]]) -> Dict[tuple, int]:
+    """Upsert one small document per (channel, bucket, wallet) and count the wallets new to each bucket.
+
+    Unique tippers are kept out of the rollup document, where a set would
+    grow with every wallet. Each row is keyed by its _id, so the _id index
+    makes a wallet count once per bucket however many writers race on it,
+    and the ids reported as upserted say which buckets gained a tipper.
+    """
+    ops = [
+        UpdateOne(
+            {"_id": {"channelId": channel_id, "granularity": granularity, "bucket": start, "wallet": wallet}},
+            {"$setOnInsert": {"firstTipAt": first_tip_at}},
+            upsert=True
+        )
+        for (channel_id, granularity, start), wallets in tippers.items()
+        for wallet, first_tip_at in wallets.items()
+    ]
+    if not ops:
+        return {}
+    try:
+        upserted = (await db.tip_rollup_tippers.bulk_write(ops, ordered=False)).upserted_ids.values()
+    except BulkWriteError as e:
+        # A concurrent writer inserted the same wallet first, so it is not new here
+        if any(error["code"] != DUPLICATE_KEY_ERROR for error in e.details.get("writeErrors", [])):
+            raise
+        upserted = [entry["_id"] for entry in e.details.get("upserted", [])]
+    new: Dict[tuple, int] = {}
+    for row in upserted:
+        key = (row["channelId"], row["granularity"], row["bucket"])
+        new[key] = new.get(key, 0) + 1
+    return new
+
+
+async def get_timeseries(db, channel_id: str, granularity: str, start: datetime, end: datetime) -> List[Dict[str, Any]]:
+    """Read rollup buckets in [start, end), filling empty buckets with zeros"""
+    first = bucket_start(start, granularity)
+    cursor = db.tip_rollups.find(
+        {"channelId": channel_id, "granularity": granularity, "bucket": {"$gte": first, "$lt": end}},
+        {"_id": 0, "bucket": 1, "count": 1, "sum": 1, "uniqueTippers": 1}
+    )
+    found = {doc["bucket"]: doc async for doc in cursor}
+
+    step = timedelta(hours=1) if granularity == "hour" else timedelta(days=1)
+    series = []
+    current = first
+    while current < end:
+        doc = found.get(current)
+        series.append({
+            "bucket": current,
+            "count": doc["count"] if doc else 0,
+            "sum": doc["sum"] if doc else 0,
+            "uniqueTippers": doc.get("uniqueTippers", 0) if doc else 0,
+        })
+        current += step
+    return series
+
+
+async def get_leaderboard(db, board: str, scope: str, window: str, limit: int, now: datetime) -> List[Dict[str, Any]]:
+    """Top-N members of a leaderboard for the current day, week or all time"""
+    period, _ = leaderboard_period(now, window)
+    cursor = db.leaderboards.find(
+        {"board": board, "scope": scope, "period": period},
+        {"_id": 0, "member": 1, "amount": 1, "count": 1}
+    ).sort([("amount", -1), ("member", 1)]).limit(limit)
+    return [
+        {"rank": position + 1, "id": entry["member"], "totalAmount": entry["amount"], "totalTips": entry["count"]}
+        for position, entry in enumerate(await cursor.to_list(limit))
+    ]
+
+
+async def get_stats(db, channel_id: str) -> Dict[str, Any]:
+    """Read the running totals and their version for a channel, zeroed when it has no tips"""
+    stats = await db.channel_stats.find_one({"_id": channel_id})
+    if not stats:
+        return {"totalTips": 0, "totalAmount": 0, "minAmount": None, "maxAmount": None, "lastTipAt": None, "version": 0}
+    return {**{field: stats.get(field) for field in STATS_FIELDS}, "version": stats.get("version", 0)}
+
+
+async def get_stats_version(db, channel_id: str) -> int:
+    """Read only the version counter of a channel's totals"""
+    stats = await db.channel_stats.find_one({"_id": channel_id}, {"_id": 0, "version": 1})
+    return stats.get("version", 0) if stats else 0
+
+
+def _differs(stored: Dict[str, Any], actual: Dict[str, Any]) -> bool:
+    for field in STATS_FIELDS:
+        a, b = stored.get(field), actual.get(field)
+        if isinstance(a, (int, float)) and isinstance(b, (int, float)):
+            if not math.isclose(a, b, rel_tol=0, abs_tol=AMOUNT_TOLERANCE):
+                return True
+        elif a != b:
+            return True
+    return False
+
+
+def _with_archived(actual: Dict[str, Any], archived: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Add a channel's archive rollup to the totals of its hot tips"""
+    if not archived:
+        return actual
+    if not actual:
+        return {
+            "totalTips": archived["count"], "totalAmount": archived["amount"],
+            "minAmount": archived["minAmount"], "maxAmount": archived["maxAmount"], "lastTipAt": archived["lastTipAt"],
+        }
+    return {
+        "totalTips": actual["totalTips"] + archived["count"],
+        "totalAmount": actual["totalAmount"] + archived["amount"],
+        "minAmount": min(actual["minAmount"], archived["minAmount"]),
+        "maxAmount": max(actual["maxAmount"], archived["maxAmount"]),
+        "lastTipAt": max(actual["lastTipAt"], archived["lastTipAt"]),
+    }
+
+
+async def reconcile(db, channel_id: Optional[str] = None, fix: bool = False) -> Dict[str, Any]:
+    """Rebuild channel totals from db.tips plus the archive rollups and report every channel that drifted.
+
+    Scans every tip, so it runs as an operator job (`check_database.py
+    reconcile`), never inside a request. Without fix the drift is only
+    reported and nothing is written. Tips recorded, or archived, while a
+    channel is being rebuilt can be miscounted by the rewrite, so a fixing
+    run is best scheduled for quiet periods and not alongside the tiering
+    job.
+    """
+    match = {"channelId": channel_id} if channel_id else {}
+    pipeline = [
+        {"$match": match},
+        {"$group": {
+            "_id": "$channelId",
+            "totalTips": {"$sum": 1},
+            "totalAmount": {"$sum": "$amount"},
+            "minAmount": {"$min": "$amount"},
+            "maxAmount": {"$max": "$amount"},
+            "lastTipAt": {"$max": "$timestamp"},
+        }}
+    ]
+    stats_query = {"_id": channel_id} if channel_id else {}
+
+    drift: List[Dict[str, Any]] = []
+    checked = 0
+    seen = set()
+
+    async def check(channel: str, actual_stats: Dict[str, Any]):
+        nonlocal checked
+        checked += 1
+        seen.add(channel)
+        stored = await db.channel_stats.find_one({"_id": channel}) or {}
+        if _differs(stored, actual_stats):
+            drift.append({
+                "channelId": channel,
+                "stored": {field: stored.get(field) for field in STATS_FIELDS},
+                "actual": actual_stats,
+            })
+            if fix:
+                await db.channel_stats.replace_one(
+                    {"_id": channel},
+                    {**actual_stats, "version": stored.get("version", 0) + 1},
+                    upsert=True
+                )
+
+    async for actual in db.tips.aggregate(pipeline, allowDiskUse=True):
+        archived = await get_archived_totals(db, "channel", actual["_id"])
+        await check(actual["_id"], _with_archived({field: actual.get(field) for field in STATS_FIELDS}, archived))
+
+    # Channels whose tips have all been archived
+    archive_query = {"kind": "channel", **({"key": channel_id} if channel_id else {})}
+    async for archived in db.tip_archive_rollups.find(archive_query, {"_id": 0}):
+        if archived["key"] not in seen:
+            await check(archived["key"], _with_archived({}, archived))
+
+    # Totals left behind for channels that no longer have any tips
+    async for stored in db.channel_stats.find(stats_query):
+        if stored["_id"] in seen:
+            continue
+        checked += 1
+        drift.append({
+            "channelId": stored["_id"],
+            "stored": {field: stored.get(field) for field in STATS_FIELDS},
+            "actual": None,
+        })
+        if fix:
+            await db.channel_stats.delete_one({"_id": stored["_id"]})
+
+    return {"channelsChecked": checked, "channelsDrifted": len(drift), "fixed": fix, "drift": drift}
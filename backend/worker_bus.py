@@ -0,0 +1,107 @@
+import asyncio
+import logging
+import os
+import socket
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+
+class WorkerBus:
+    """Broadcast channel between the worker processes of one host.
+
+    Every worker binds a Unix datagram socket named after its pid in a
+    shared directory, and `publish` sends one datagram to each of the
+    other sockets there. Delivery is best effort: a message to a peer
+    whose receive buffer is full is dropped and counted, and sockets left
+    behind by dead workers are removed on the first failed send.
+    Messages are handled by the callable registered for their kind.
+    """
+
+    def __init__(self, directory: Optional[str], handlers: Dict[str, Callable[[Any], None]], peer_refresh: float = 1.0):
+        self.directory = Path(directory) if directory else None
+        self.handlers = handlers
+        self.peer_refresh = peer_refresh
+        self._socket: Optional[socket.socket] = None
+        self._path: Optional[Path] = None
+        self._peers: List[str] = []
+        self._peers_listed_at = 0.0
+        self.sent = 0
+        self.received = 0
+        self.dropped = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._socket is not None
+
+    def start(self):
+        if self.directory is None:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._path = self.directory / f"{os.getpid()}.sock"
+        self._path.unlink(missing_ok=True)
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._socket.setblocking(False)
+        self._socket.bind(str(self._path))
+        asyncio.get_running_loop().add_reader(self._socket.fileno(), self._receive)
+        logger.info("Worker bus listening on %s", self._path)
+
+    def stop(self):
+        if self._socket is None:
+            return
+        asyncio.get_running_loop().remove_reader(self._socket.fileno())
+        self._socket.close()
+        self._socket = None
+        self._path.unlink(missing_ok=True)
+
+    def _list_peers(self) -> List[str]:
+        now = time.monotonic()
+        if now - self._peers_listed_at > self.peer_refresh:
+            self._peers = [str(path) for path in self.directory.glob("*.sock") if path != self._path]
+            self._peers_listed_at = now
+        return self._peers
+
+    def publish(self, kind: str, data: Any):
+        """Send a message to every other worker; a no-op when running single-process"""
+        if self._socket is None:
+            return
+        message = orjson.dumps({"kind": kind, "data": data})
+        for peer in self._list_peers():
+            try:
+                self._socket.sendto(message, peer)
+                self.sent += 1
+            except BlockingIOError:
+                self.dropped += 1
+            except (ConnectionRefusedError, FileNotFoundError):
+                # The worker behind this socket has exited
+                Path(peer).unlink(missing_ok=True)
+                self._peers_listed_at = 0.0
+            except OSError as e:
+                self.dropped += 1
+                logger.warning("Worker bus send to %s failed: %s", peer, e)
+
+    def _receive(self):
+        while True:
+            try:
+                message = self._socket.recv(262144)
+            except (BlockingIOError, InterruptedError):
+                return
+            self.received += 1
+            try:
+                decoded = orjson.loads(message)
+                self.handlers[decoded["kind"]](decoded["data"])
+            except Exception:
+                logger.exception("Worker bus message could not be handled")
+
+    def stats(self):
+        return {
+            "enabled": self.enabled,
+            "peers": len(self._peers),
+            "sent": self.sent,
+            "received": self.received,
+            "dropped": self.dropped,
+        }
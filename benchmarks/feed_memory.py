@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""Memory held by idle and stalled live tip feed subscribers.
+
+Opens N subscriptions spread over channel topics, each with a task
+parked on it the way an open SSE stream is, and measures the traced
+memory per subscriber. Then publishes far more tips than the per
+subscriber buffer holds without anyone reading, to show that stalled
+consumers are evicted instead of buffering without bound.
+
+    python benchmarks/feed_memory.py [--subscribers 10000] [--max-kib 4]
+
+Exits non-zero when an idle subscriber costs more than --max-kib, or when
+buffered events outgrow the feed's max_buffer limit.
+"""
+import argparse
+import asyncio
+import gc
+import sys
+import tracemalloc
+
+from load import BACKEND_DIR
+
+sys.path.insert(0, str(BACKEND_DIR))
+from tip_feed import TipFeed  # noqa: E402
+
+EVENT = b'event: tip\nid: 00000000-0000-0000-0000-000000000000\ndata: {"amount":1.0}\n\n'
+
+
+async def run(args) -> int:
+    feed = TipFeed(max_buffer=args.max_buffer, max_subscribers=args.subscribers)
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+
+    subscriptions = [feed.subscribe(f"channel:UC{i % args.channels}") for i in range(args.subscribers)]
+    waiters = [asyncio.create_task(sub.next_batch(3600)) for sub in subscriptions]
+    await asyncio.sleep(0)
+    gc.collect()
+    idle = tracemalloc.get_traced_memory()[0] - before
+    per_subscriber = idle / args.subscribers
+    print(f"{args.subscribers} idle subscribers on {args.channels} channels: "
+          f"{idle / 2**20:.1f} MiB, {per_subscriber / 1024:.2f} KiB each")
+
+    # Nobody reads: each subscription fills to max_buffer and is then evicted
+    for _ in range(args.max_buffer * 3):
+        for channel in range(args.channels):
+            feed.publish((f"channel:UC{channel}",), EVENT)
+        await asyncio.sleep(0)
+    buffered = sum(len(sub.buffer) for sub in subscriptions)
+    stats = feed.stats()
+    print(f"After {stats['published']} publishes: {stats['evictions']} evicted, "
+          f"{stats['subscribers']} still subscribed, {buffered} events buffered")
+
+    for waiter in waiters:
+        waiter.cancel()
+    await asyncio.gather(*waiters, return_exceptions=True)
+    tracemalloc.stop()
+
+    failures = []
+    if per_subscriber > args.max_kib * 1024:
+        failures.append(f"idle subscriber uses {per_subscriber / 1024:.2f} KiB, limit {args.max_kib} KiB")
+    if buffered > args.max_buffer * args.subscribers or stats["subscribers"]:
+        failures.append("stalled subscribers were not evicted")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--subscribers", type=int, default=10000)
+    parser.add_argument("--channels", type=int, default=500, help="distinct channel topics")
+    parser.add_argument("--max-buffer", type=int, default=100, help="events buffered per subscriber")
+    parser.add_argument("--max-kib", type=float, default=4.0, help="allowed memory per idle subscriber")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""Load test for the Amplify API with latency percentiles and regression baselines.
+
+Drives a realistic traffic mix from many concurrent async clients:
+mostly /api/creator lookups (registered and unregistered channels), some
+/api/stats reads, plus periodic bursts of /api/tip writes.
+
+Targets:
+    --base-url URL   an already running server
+    (default)        spawns `uvicorn server:app` against $MONGO_URL (local mongod),
+                     in a throwaway database that is dropped when the run ends
+    --in-process     runs the app in this process on mongomock-motor
+
+    python benchmarks/load.py --clients 50 --duration 20
+    python benchmarks/load.py --save-baseline local
+    python benchmarks/load.py --compare local --tolerance 0.2
+
+A response counts as an error unless it has the status the operation
+expects: 404 for unregistered channel lookups, 2xx or 304 for the rest,
+so a 404, 409 or 429 where a success was due is an error.
+
+With --compare the run exits non-zero when any endpoint's p95/p99 latency
+grows, or its throughput drops, by more than the tolerance, or its error
+rate goes above --max-error-rate (or the baseline's rate, if higher).
+
+Latency is machine-specific, so baselines are only comparable on the
+machine that recorded them. benchmarks/baselines/in-process.json is a
+reference run of `--in-process`; CI records its own on the target
+branch with `--save-baseline ci` and runs `--compare ci` on changes,
+both on the same runner.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+import uuid
+from collections import defaultdict
+from pathlib import Path
+
+import httpx
+from dotenv import load_dotenv
+from pymongo import MongoClient
+
+# One INFO line per request would dominate the run
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+ROOT = Path(__file__).resolve().parent.parent
+BACKEND_DIR = ROOT / "backend"
+BASELINE_DIR = Path(__file__).resolve().parent / "baselines"
+
+# Share of steady-state traffic per operation; tips also arrive in bursts
+MIX = [("creator", 0.75), ("creator_unregistered", 0.15), ("stats", 0.10)]
+
+# Statuses that count as a successful sample for operations not expecting 2xx or 304
+EXPECTED_STATUS = {"creator_unregistered": {404}}
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    async def timed(self, name, request):
+        start = time.perf_counter()
+        try:
+            response = await request
+            expected = EXPECTED_STATUS.get(name)
+            ok = response.status_code in expected if expected else response.is_success or response.status_code == 304
+        except httpx.HTTPError:
+            ok = False
+        elapsed = time.perf_counter() - start
+        if ok:
+            self.latencies[name].append(elapsed)
+        else:
+            self.errors[name] += 1
+
+    def report(self, duration):
+        results = {}
+        for name in sorted(set(self.latencies) | set(self.errors)):
+            values = sorted(self.latencies[name])
+            results[name] = {
+                "requests": len(values),
+                "errors": self.errors[name],
+                "rps": round(len(values) / duration, 1),
+                "p50_ms": round(percentile(values, 50) * 1000, 2),
+                "p95_ms": round(percentile(values, 95) * 1000, 2),
+                "p99_ms": round(percentile(values, 99) * 1000, 2),
+            }
+        total = sum(len(v) for v in self.latencies.values())
+        results["total"] = {"requests": total, "rps": round(total / duration, 1)}
+        return results
+
+
+async def seed(client, creators):
+    channels = []
+    for i in range(creators):
+        channel_id = f"UCbench{uuid.uuid4().hex[:16]}"
+        wallet = f"Bench{uuid.uuid4().hex}"
+        response = await client.post("/api/register", json={"channelId": channel_id, "walletAddress": wallet})
+        response.raise_for_status()
+        channels.append((channel_id, wallet))
+    return channels
+
+
+async def steady_client(client, recorder, channels, deadline):
+    names, weights = zip(*MIX)
+    while time.perf_counter() < deadline:
+        op = random.choices(names, weights)[0]
+        channel_id, _ = random.choice(channels)
+        if op == "creator":
+            await recorder.timed(op, client.get("/api/creator", params={"channelId": channel_id}))
+        elif op == "creator_unregistered":
+            await recorder.timed(op, client.get("/api/creator", params={"channelId": f"UCnone{uuid.uuid4().hex[:16]}"}))
+        else:
+            await recorder.timed(op, client.get(f"/api/stats/{channel_id}"))
+        # The in-process stand-in never blocks on I/O, so yield to the other clients
+        await asyncio.sleep(0)
+
+
+async def tip_bursts(client, recorder, channels, deadline, size, interval):
+    while time.perf_counter() < deadline:
+        burst = []
+        for _ in range(size):
+            channel_id, wallet = random.choice(channels)
+            burst.append(recorder.timed("tip", client.post("/api/tip", json={
+                "fromWallet": f"Fan{random.randint(0, 999)}",
+                "toWallet": wallet,
+                "channelId": channel_id,
+                "amount": round(random.uniform(0.1, 5), 2),
+                "signature": uuid.uuid4().hex,
+            })))
+        await asyncio.gather(*burst)
+        await asyncio.sleep(interval)
+
+
+async def run_load(client, args):
+    channels = await seed(client, args.creators)
+    recorder = Recorder()
+    start = time.perf_counter()
+    deadline = start + args.duration
+    tasks = [steady_client(client, recorder, channels, deadline) for _ in range(args.clients)]
+    tasks.append(tip_bursts(client, recorder, channels, deadline, args.burst_size, args.burst_interval))
+    await asyncio.gather(*tasks)
+    return recorder.report(time.perf_counter() - start)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def wait_for_health(base_url, timeout=30.0):
+    deadline = time.perf_counter() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.perf_counter() < deadline:
+            try:
+                if (await client.get("/api/health")).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.1)
+    raise RuntimeError(f"Server at {base_url} did not become healthy within {timeout}s")
+
+
+def throwaway_database(prefix: str) -> str:
+    """Name a fresh database for a spawned server; $DB_NAME is ignored so a real one is never written to"""
+    return f"{prefix}_{uuid.uuid4().hex[:8]}"
+
+
+def drop_database(name: str):
+    """Drop a throwaway database once its server has stopped"""
+    # The spawned server reads MONGO_URL from backend/.env when it is not set
+    load_dotenv(BACKEND_DIR / ".env")
+    with MongoClient(os.environ["MONGO_URL"], serverSelectionTimeoutMS=5000) as client:
+        client.drop_database(name)
+
+
+async def run(args):
+    limits = httpx.Limits(max_connections=args.clients + args.burst_size)
+    if args.in_process:
+        from mongomock_motor import AsyncMongoMockClient
+
+        os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+        os.environ.setdefault("DB_NAME", "amplify_bench")
+        os.environ.setdefault("AUTO_CREATE_INDEXES", "true")
+        # Every simulated client shares one address, which the per-IP limits would throttle
+        os.environ.setdefault("RATE_LIMITING", "false")
+        sys.path.insert(0, str(BACKEND_DIR))
+        import server
+
+        server.client = AsyncMongoMockClient()
+        server.db = server.client[os.environ["DB_NAME"]]
+        await server.startup_event()
+        try:
+            transport = httpx.ASGITransport(app=server.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", limits=limits) as client:
+                return await run_load(client, args)
+        finally:
+            await server.shutdown_db_client()
+
+    process = database = None
+    base_url = args.base_url
+    if not base_url:
+        port = free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        database = throwaway_database("amplify_bench")
+        env = {
+            **os.environ,
+            "DB_NAME": database,
+            "AUTO_CREATE_INDEXES": "true",
+            "RATE_LIMITING": os.environ.get("RATE_LIMITING", "false"),
+        }
+        process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "server:app", "--port", str(port), "--log-level", "warning"],
+            cwd=BACKEND_DIR, env=env
+        )
+    try:
+        await wait_for_health(base_url)
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+            return await run_load(client, args)
+    finally:
+        if process:
+            process.terminate()
+            process.wait(timeout=10)
+            drop_database(database)
+
+
+def error_rate(result):
+    attempts = result["requests"] + result["errors"]
+    return result["errors"] / attempts if attempts else 0.0
+
+
+def compare(results, baseline, tolerance, max_error_rate):
+    failures = []
+    for name, current in results.items():
+        if name == "total":
+            continue
+        allowed = max(max_error_rate, error_rate(baseline[name]) if name in baseline else 0.0)
+        if error_rate(current) > allowed:
+            failures.append(f"{name} error rate: {error_rate(current):.2%} > {allowed:.2%}")
+    for name, base in baseline.items():
+        current = results.get(name)
+        if current is None or name == "total":
+            continue
+        for metric in ("p95_ms", "p99_ms"):
+            if base[metric] and current[metric] > base[metric] * (1 + tolerance):
+                failures.append(f"{name} {metric}: {current[metric]} > baseline {base[metric]}")
+        if base["rps"] and current["rps"] < base["rps"] * (1 - tolerance):
+            failures.append(f"{name} rps: {current['rps']} < baseline {base['rps']}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", help="benchmark an already running server")
+    parser.add_argument("--in-process", action="store_true", help="run the app in-process on mongomock-motor")
+    parser.add_argument("--clients", type=int, default=50, help="concurrent steady-state clients")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds of load")
+    parser.add_argument("--creators", type=int, default=200, help="creators registered before the run")
+    parser.add_argument("--burst-size", type=int, default=50, help="tips per burst")
+    parser.add_argument("--burst-interval", type=float, default=1.0, help="seconds between tip bursts")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--save-baseline", metavar="NAME", help="write results to benchmarks/baselines/NAME.json")
+    parser.add_argument("--compare", metavar="NAME", help="fail if results regress against baseline NAME")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed regression as a fraction")
+    parser.add_argument("--max-error-rate", type=float, default=0.01,
+                        help="largest share of unexpected responses per endpoint allowed by --compare")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    results = asyncio.run(run(args))
+
+    print(f"{'endpoint':<22}{'requests':>10}{'errors':>8}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, r in results.items():
+        if name == "total":
+            continue
+        print(f"{name:<22}{r['requests']:>10}{r['errors']:>8}{r['rps']:>10}{r['p50_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}")
+    print(f"{'total':<22}{results['total']['requests']:>10}{'':>8}{results['total']['rps']:>10}")
+
+    if args.save_baseline:
+        BASELINE_DIR.mkdir(exist_ok=True)
+        path = BASELINE_DIR / f"{args.save_baseline}.json"
+        path.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"Baseline saved to {path}")
+
+    if args.compare:
+        path = BASELINE_DIR / f"{args.compare}.json"
+        if not path.exists():
+            sys.exit(f"No baseline at {path}; record one with --save-baseline {args.compare}")
+        baseline = json.loads(path.read_text())
+        failures = compare(results, baseline, args.tolerance, args.max_error_rate)
+        if failures:
+            print("Regression against baseline:")
+            for failure in failures:
+                print(f"  {failure}")
+            sys.exit(1)
+        print(f"No regression against baseline '{args.compare}'")
+
+
+if __name__ == "__main__":
+    main()
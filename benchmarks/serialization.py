@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""Serialization cost of the tip list endpoints per 1,000 tips.
+
+"before" is the old path: build TipRecord(**doc) for every Mongo document,
+then let FastAPI re-validate the list against response_model and encode it
+with the stdlib JSONResponse. "after" is the current path: projected
+documents encoded directly with ORJSONResponse.
+
+    python benchmarks/serialization.py [--tips 1000] [--rounds 50]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List
+
+from bson import ObjectId
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "amplify_bench")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from fastapi.responses import JSONResponse, ORJSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+from fastapi.utils import create_response_field  # noqa: E402
+
+from server import TIP_FIELDS, TipRecord  # noqa: E402
+
+
+def make_documents(count: int, projected: bool) -> List[dict]:
+    now = datetime.utcnow()
+    docs = []
+    for i in range(count):
+        doc = {
+            "id": str(uuid.uuid4()),
+            "fromWallet": f"From{uuid.uuid4().hex}",
+            "toWallet": f"To{uuid.uuid4().hex}",
+            "channelId": "UC" + uuid.uuid4().hex[:22],
+            "amount": 0.1 * (i % 50 + 1),
+            "signature": uuid.uuid4().hex * 2,
+            "timestamp": now - timedelta(seconds=i),
+        }
+        if not projected:
+            doc["_id"] = ObjectId()
+        docs.append({field: doc[field] for field in TIP_FIELDS} if projected else doc)
+    return docs
+
+
+async def before(docs, field):
+    models = [TipRecord(**doc) for doc in docs]
+    content = await serialize_response(field=field, response_content=models)
+    return JSONResponse(content=content).body
+
+
+async def after(docs, field):
+    return ORJSONResponse(content=docs).body
+
+
+async def measure(func, docs, field, rounds):
+    await func(docs, field)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        await func(docs, field)
+    return (time.perf_counter() - start) / rounds
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tips", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+
+    field = create_response_field(name="Response_tips", type_=List[TipRecord])
+    old = await measure(before, make_documents(args.tips, projected=False), field, args.rounds)
+    new = await measure(after, make_documents(args.tips, projected=True), field, args.rounds)
+
+    per_thousand = 1000 / args.tips
+    print(f"tips per response: {args.tips}, rounds: {args.rounds}")
+    print(f"before (TipRecord + response_model + json): {old * per_thousand * 1000:8.2f} ms / 1,000 tips")
+    print(f"after  (projection + orjson):               {new * per_thousand * 1000:8.2f} ms / 1,000 tips")
+    print(f"speedup: {old / new:.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""Cold-start time of an API worker.
+
+Measures wall time from launching `uvicorn server:app` to the first
+successful GET /api/health, against the MongoDB in $MONGO_URL. Indexes
+are expected to exist already (`python backend/migrate.py indexes`), as
+in production.
+
+    python benchmarks/startup.py [--runs 5]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+from load import BACKEND_DIR, free_port
+
+
+def measure_once(timeout: float) -> float:
+    port = free_port()
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=os.environ.copy()
+    )
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=1.0) as client:
+            while time.perf_counter() - start < timeout:
+                try:
+                    if client.get("/api/health").status_code == 200:
+                        return time.perf_counter() - start
+                except httpx.HTTPError:
+                    pass
+                if process.poll() is not None:
+                    raise RuntimeError(f"Server exited with code {process.returncode}")
+                time.sleep(0.005)
+        raise RuntimeError(f"Server did not become healthy within {timeout}s")
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    timings = [measure_once(args.timeout) for _ in range(args.runs)]
+    for i, seconds in enumerate(timings, 1):
+        print(f"run {i}: {seconds * 1000:8.1f} ms")
+    print(f"median: {statistics.median(timings) * 1000:.1f} ms, "
+          f"min: {min(timings) * 1000:.1f} ms, max: {max(timings) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
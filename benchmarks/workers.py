@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""Multi-worker mode check: shared sessions, coherent caches and scaling.
+
+Starts `uvicorn server:app --workers N` in multi-worker mode (shared
+SESSION_SECRET, WORKER_BUS_DIR) against a throwaway database, dropped
+afterwards, in the MongoDB at $MONGO_URL, with Google's token endpoint
+and the YouTube API pointed at a local stand-in, and checks, over fresh
+connections that the kernel spreads across workers:
+
+  * an OAuth flow started on one worker completes on whichever worker
+    serves the callback, and the connected channel then resolves
+  * a newly registered channel resolves on every worker immediately
+  * a settings change is visible on every worker, caches included
+
+It then runs the load mix from load.py against 1 worker and N workers
+and fails if throughput does not scale by at least --min-efficiency x N.
+
+    python benchmarks/workers.py --workers 4
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import uuid
+from argparse import Namespace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import httpx
+
+from load import BACKEND_DIR, drop_database, free_port, run_load, throwaway_database, wait_for_health
+
+
+class GoogleStandInHandler(BaseHTTPRequestHandler):
+    """Answers the token exchange and channel lookup the OAuth callback makes.
+
+    The access token echoes the authorization code, and the channel it
+    owns is derived from it, so every flow connects its own channel.
+    """
+
+    def do_POST(self):
+        form = parse_qs(self.rfile.read(int(self.headers["Content-Length"])).decode())
+        if urlparse(self.path).path != "/token" or "code" not in form:
+            return self.reply(400, {"error": "invalid_request"})
+        code = form["code"][0]
+        self.reply(200, {
+            "access_token": f"access-{code}",
+            "refresh_token": f"refresh-{code}",
+            "token_type": "Bearer",
+            "expires_in": 3600,
+            "scope": "https://www.googleapis.com/auth/youtube.readonly",
+        })
+
+    def do_GET(self):
+        token = self.headers.get("Authorization", "").removeprefix("Bearer ")
+        if urlparse(self.path).path != "/youtube/v3/channels" or not token.startswith("access-"):
+            return self.reply(401, {"error": {"code": 401, "message": "unauthorized"}})
+        code = token.removeprefix("access-")
+        self.reply(200, {"items": [{"id": f"UC{code}", "snippet": {"title": f"Bench {code}"}}]})
+
+    def reply(self, status: int, body: dict):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_google_stand_in() -> tuple:
+    stand_in = ThreadingHTTPServer(("127.0.0.1", 0), GoogleStandInHandler)
+    threading.Thread(target=stand_in.serve_forever, daemon=True).start()
+    return stand_in, f"http://127.0.0.1:{stand_in.server_address[1]}"
+
+
+def start_server(workers: int, bus_dir: str, google_url: str, database: str) -> tuple:
+    port = free_port()
+    env = {
+        **os.environ,
+        "DB_NAME": database,
+        "AUTO_CREATE_INDEXES": "true",
+        "RATE_LIMITING": os.environ.get("RATE_LIMITING", "false"),
+        "SESSION_SECRET": os.environ.get("SESSION_SECRET", uuid.uuid4().hex * 2),
+        "WORKER_BUS_DIR": bus_dir,
+        "GOOGLE_CLIENT_ID": os.environ.get("GOOGLE_CLIENT_ID", "bench-client-id"),
+        "GOOGLE_CLIENT_SECRET": os.environ.get("GOOGLE_CLIENT_SECRET", "bench-client-secret"),
+        "GOOGLE_TOKEN_URI": f"{google_url}/token",
+        "YOUTUBE_API_ENDPOINT": google_url,
+        # oauthlib refuses plain-HTTP token endpoints otherwise
+        "OAUTHLIB_INSECURE_TRANSPORT": "1",
+    }
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server:app", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env
+    )
+    return process, f"http://127.0.0.1:{port}"
+
+
+async def check_oauth(base_url: str, flows: int) -> list:
+    failures = []
+    for _ in range(flows):
+        wallet = f"Bench{uuid.uuid4().hex}"
+        # A new client per step means a new connection, usually to another worker
+        async with httpx.AsyncClient(base_url=base_url) as client:
+            response = await client.get("/api/oauth/youtube/initiate", params={"wallet_address": wallet})
+        if response.status_code != 307:
+            failures.append(f"initiate returned {response.status_code}: {response.text[:200]}")
+            continue
+        state = parse_qs(urlparse(response.headers["location"]).query)["state"][0]
+        code = uuid.uuid4().hex
+        async with httpx.AsyncClient(base_url=base_url, cookies=response.cookies, timeout=30.0) as client:
+            callback = await client.get("/api/oauth/youtube/callback", params={"code": code, "state": state})
+        if callback.status_code != 307 or "oauth=success" not in callback.headers.get("location", ""):
+            failures.append(f"callback failed with {callback.status_code}: {callback.headers.get('location') or callback.text[:200]}")
+            continue
+        async with httpx.AsyncClient(base_url=base_url) as client:
+            creator = await client.get("/api/creator", params={"channelId": f"UC{code}"})
+        if creator.status_code != 200 or creator.json()["walletAddress"] != wallet:
+            failures.append(f"connected channel did not resolve: {creator.status_code}")
+    return failures
+
+
+async def check_lookups(base_url: str, reads: int) -> list:
+    failures = []
+    channel_id = f"UCbench{uuid.uuid4().hex[:16]}"
+    wallet = f"Bench{uuid.uuid4().hex}"
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        (await client.post("/api/register", json={"channelId": channel_id, "walletAddress": wallet})).raise_for_status()
+
+    async def read_everywhere():
+        results = []
+        for _ in range(reads):
+            async with httpx.AsyncClient(base_url=base_url) as client:
+                results.append(await client.get("/api/creator", params={"channelId": channel_id}))
+        return results
+
+    for response in await read_everywhere():
+        if response.status_code != 200:
+            failures.append(f"new channel not found on a worker: {response.status_code}")
+            break
+
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        (await client.put("/api/creator/settings", params={"wallet_address": wallet}, json={"defaultTipAmount": 0.42})).raise_for_status()
+    await asyncio.sleep(0.1)
+    stale = [r for r in await read_everywhere() if r.status_code != 200 or r.json()["defaultTipAmount"] != 0.42]
+    if stale:
+        failures.append(f"{len(stale)} of {reads} reads saw a stale creator after a settings change")
+    return failures
+
+
+def load_process(base_url: str, clients: int, duration: float) -> int:
+    args = Namespace(creators=50, clients=clients, duration=duration, burst_size=10, burst_interval=1.0)
+
+    async def run():
+        limits = httpx.Limits(max_connections=clients + args.burst_size)
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+            return await run_load(client, args)
+
+    return asyncio.run(run())["total"]["requests"]
+
+
+def measure_throughput(base_url: str, args) -> float:
+    with multiprocessing.Pool(args.client_processes) as pool:
+        totals = pool.starmap(
+            load_process, [(base_url, args.clients, args.duration)] * args.client_processes
+        )
+    return sum(totals) / args.duration
+
+
+def run_against(workers: int, args, checks: bool) -> tuple:
+    stand_in, google_url = start_google_stand_in()
+    database = throwaway_database("amplify_workers")
+    with tempfile.TemporaryDirectory() as bus_dir:
+        process, base_url = start_server(workers, bus_dir, google_url, database)
+        try:
+            asyncio.run(wait_for_health(base_url))
+            failures = []
+            if checks:
+                failures += asyncio.run(check_oauth(base_url, args.oauth_flows))
+                failures += asyncio.run(check_lookups(base_url, args.reads))
+            return measure_throughput(base_url, args), failures
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+            stand_in.shutdown()
+            drop_database(database)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--oauth-flows", type=int, default=40)
+    parser.add_argument("--reads", type=int, default=40, help="fresh-connection reads per coherence check")
+    parser.add_argument("--client-processes", type=int, default=4, help="load generator processes")
+    parser.add_argument("--clients", type=int, default=25, help="concurrent clients per load process")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--min-efficiency", type=float, default=0.6,
+                        help="required N-worker throughput as a fraction of N x single-worker")
+    args = parser.parse_args()
+
+    single, _ = run_against(1, args, checks=False)
+    multi, failures = run_against(args.workers, args, checks=True)
+    scaling = multi / single if single else 0.0
+    print(f"1 worker:  {single:.1f} req/s")
+    print(f"{args.workers} workers: {multi:.1f} req/s ({scaling:.2f}x)")
+
+    if scaling < args.min_efficiency * args.workers:
+        failures.append(f"throughput scaled {scaling:.2f}x, expected at least {args.min_efficiency * args.workers:.2f}x")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
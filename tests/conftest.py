@@ -0,0 +1,89 @@
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+from mongomock_motor import AsyncMongoMockClient
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "amplify_test")
+os.environ.setdefault("GOOGLE_CLIENT_ID", "test-client-id")
+os.environ.setdefault("GOOGLE_CLIENT_SECRET", "test-client-secret")
+os.environ["AUTO_CREATE_INDEXES"] = "true"
+os.environ["RATE_LIMITING"] = "false"
+
+import server as amplify_server  # noqa: E402
+from creator_cache import CreatorLookupCache  # noqa: E402
+from membership_index import ChannelMembershipIndex  # noqa: E402
+
+
+@pytest.fixture
+def server(monkeypatch):
+    """The API module wired to a fresh in-memory database and fresh in-process state"""
+    client = AsyncMongoMockClient()
+    monkeypatch.setattr(amplify_server, "client", client)
+    monkeypatch.setattr(amplify_server, "db", client[os.environ["DB_NAME"]])
+    monkeypatch.setattr(amplify_server, "creator_cache", CreatorLookupCache())
+    monkeypatch.setattr(amplify_server, "channel_index", ChannelMembershipIndex(capacity=1000))
+    # Shutdown stops the executor, so every app start gets its own
+    monkeypatch.setattr(amplify_server, "google_executor", ThreadPoolExecutor(max_workers=amplify_server.GOOGLE_API_CONCURRENCY))
+    return amplify_server
+
+
+@pytest.fixture
+def api(server):
+    with TestClient(server.app) as client:
+        yield client
+
+
+
+class FakeGoogle:
+    """Local stand-in for the Google OAuth token exchange and YouTube channel lookup"""
+
+    def __init__(self):
+        self.channel_id = "UCtest"
+        self.channel_name = "Test Channel"
+        self.token_delay = 0.0
+        self.exchanges_started = 0
+        self.token_exchanges = 0
+
+    def create_oauth_flow(self):
+        google = self
+
+        class Flow:
+            credentials = None
+
+            def authorization_url(self, **kwargs):
+                return "https://accounts.google.test/o/oauth2/auth?state=test-state", "test-state"
+
+            def fetch_token(self, code, **kwargs):
+                google.exchanges_started += 1
+                time.sleep(google.token_delay)
+                google.token_exchanges += 1
+                self.credentials = SimpleNamespace(token=f"access-{code}", refresh_token=f"refresh-{code}")
+
+        return Flow()
+
+    def fetch_youtube_channels(self, access_token: str) -> dict:
+        return {"items": [{"id": self.channel_id, "snippet": {"title": self.channel_name}}]}
+
+    def connect(self, api, wallet_address: str, code: str = "code"):
+        """Run the OAuth initiate and callback round trip for a wallet"""
+        initiate = api.get("/api/oauth/youtube/initiate", params={"wallet_address": wallet_address}, follow_redirects=False)
+        assert initiate.status_code == 307
+        return api.get("/api/oauth/youtube/callback", params={"code": code, "state": "test-state"}, follow_redirects=False)
+
+
+@pytest.fixture
+def google(server, monkeypatch):
+    fake = FakeGoogle()
+    monkeypatch.setattr(server, "create_oauth_flow", fake.create_oauth_flow)
+    monkeypatch.setattr(server, "fetch_youtube_channels", fake.fetch_youtube_channels)
+    return fake
@@ -0,0 +1,62 @@
+def tip(signature: str, channel_id: str = "legacy1", amount: float = 1.0) -> dict:
+    return {"fromWallet": "Tipper1", "toWallet": "Wallet1", "channelId": channel_id, "amount": amount, "signature": signature}
+
+
+def test_connecting_youtube_keeps_tips_under_the_registered_id(api, google):
+    assert api.post("/api/register", json={"channelId": "legacy1", "walletAddress": "Wallet1"}).status_code == 200
+    for signature in ("s1", "s2", "s3"):
+        assert api.post("/api/tip", json=tip(signature)).status_code == 200
+
+    google.channel_id = "UCyt"
+    callback = google.connect(api, "Wallet1")
+    assert callback.status_code == 307
+    assert "oauth=success" in callback.headers["location"]
+
+    for channel_id in ("legacy1", "UCyt"):
+        stats = api.get(f"/api/stats/{channel_id}").json()
+        assert stats["totalTips"] == 3
+        assert stats["totalAmount"] == 3.0
+        assert len(api.get(f"/api/tips/{channel_id}").json()) == 3
+        assert api.get("/api/creator", params={"channelId": channel_id}).json()["channelId"] == "legacy1"
+
+    channels = api.get("/api/leaderboard/channels", params={"window": "all"}).json()["channels"]
+    assert [(entry["id"], entry["totalTips"]) for entry in channels] == [("legacy1", 3)]
+
+    # A retry of a tip from before the connect is still a replay, not a conflict
+    replay = api.post("/api/tip", json=tip("s1"))
+    assert replay.status_code == 200
+    assert replay.json()["channelId"] == "legacy1"
+
+    # New tips sent to either id land on the same totals
+    assert api.post("/api/tip", json=tip("s4", channel_id="UCyt")).json()["channelId"] == "legacy1"
+    assert api.get("/api/stats/UCyt").json()["totalTips"] == 4
+
+
+def test_creator_first_seen_through_youtube_is_keyed_by_their_youtube_id(api, google):
+    google.channel_id = "UCnew"
+    assert "oauth=success" in google.connect(api, "Wallet1").headers["location"]
+
+    assert api.get("/api/creator", params={"walletAddress": "Wallet1"}).json()["channelId"] == "UCnew"
+    assert api.post("/api/tip", json=tip("s1", channel_id="UCnew")).json()["channelId"] == "UCnew"
+
+    # Reconnecting a different YouTube channel does not move the creator's tips
+    google.channel_id = "UCother"
+    assert "oauth=success" in google.connect(api, "Wallet1").headers["location"]
+    assert api.get("/api/stats/UCnew").json()["totalTips"] == 1
+    assert api.get("/api/stats/UCother").json()["totalTips"] == 1
+
+
+def test_a_channel_left_by_a_reconnect_can_be_connected_by_its_new_owner(api, google):
+    google.channel_id = "UC1"
+    assert "oauth=success" in google.connect(api, "Wallet1").headers["location"]
+    google.channel_id = "UC2"
+    assert "oauth=success" in google.connect(api, "Wallet1").headers["location"]
+
+    # Wallet1's current channel is still taken
+    assert google.connect(api, "Wallet2").status_code == 400
+    google.channel_id = "UC1"
+    assert "oauth=success" in google.connect(api, "Wallet2").headers["location"]
+
+    assert api.get("/api/creator", params={"channelId": "UC1"}).json()["walletAddress"] == "Wallet2"
+    assert api.get("/api/creator", params={"walletAddress": "Wallet1"}).json()["channelId"] == "UC2"
+    assert api.post("/api/tip", json={**tip("s1", channel_id="UC2"), "toWallet": "Wallet1"}).json()["channelId"] == "UC2"
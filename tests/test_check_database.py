@@ -0,0 +1,38 @@
+from argparse import Namespace
+from datetime import datetime, timedelta
+
+import orjson
+
+import check_database
+import tip_archive
+
+
+def report(api, server, capsys, command) -> list:
+    args = Namespace(format="ndjson", output=None, batch_size=2)
+    api.portal.call(command, server.db, args)
+    return [orjson.loads(line) for line in capsys.readouterr().out.splitlines()]
+
+
+def test_orphans_and_summary_include_archived_tips(api, server, capsys):
+    api.post("/api/register", json={"channelId": "UC1", "walletAddress": "Wallet1"})
+    api.post("/api/tip", json={"fromWallet": "Tipper1", "toWallet": "Wallet1", "channelId": "UC1", "amount": 1.0, "signature": "s1"})
+
+    async def seed_orphans():
+        now = datetime.utcnow()
+        await server.db.tips.insert_many([
+            {"id": "o1", "channelId": "gone", "fromWallet": "Tipper1", "toWallet": "W9", "amount": 2.0, "signature": "o1", "timestamp": now - timedelta(days=200)},
+            {"id": "o2", "channelId": "gone", "fromWallet": "Tipper1", "toWallet": "W9", "amount": 3.0, "signature": "o2", "timestamp": now},
+            {"id": "o3", "channelId": "archived-only", "fromWallet": "Tipper1", "toWallet": "W8", "amount": 4.0, "signature": "o3", "timestamp": now - timedelta(days=100)},
+        ])
+        await tip_archive.archive_tips(server.db, now - timedelta(days=90))
+
+    api.portal.call(seed_orphans)
+
+    orphans = {row["channelId"]: row for row in report(api, server, capsys, check_database.find_orphans)}
+    assert set(orphans) == {"gone", "archived-only"}
+    assert (orphans["gone"]["tips"], orphans["gone"]["amount"]) == (2, 5.0)
+    assert (orphans["archived-only"]["tips"], orphans["archived-only"]["amount"]) == (1, 4.0)
+
+    [summary] = report(api, server, capsys, check_database.summary)
+    assert (summary["tips"], summary["archivedTips"]) == (4, 2)
+    assert summary["totalAmount"] == 10.0
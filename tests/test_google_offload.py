@@ -0,0 +1,50 @@
+import asyncio
+import time
+
+import httpx
+
+
+async def connect_while_reading(server, google, reads: int) -> tuple:
+    """Run one OAuth callback and, while its token exchange is in flight, a series of other requests"""
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://amplify.test") as client:
+        await client.post("/api/register", json={"channelId": "UC1", "walletAddress": "Wallet1"})
+        initiate = await client.get("/api/oauth/youtube/initiate", params={"wallet_address": "Wallet2"})
+        assert initiate.status_code == 307
+
+        callback = asyncio.create_task(client.get("/api/oauth/youtube/callback", params={"code": "slow", "state": "test-state"}))
+        started = time.perf_counter()
+        while not google.exchanges_started:
+            await asyncio.sleep(0.01)
+
+        latencies = []
+        for path, params in [("/api/health", {}), ("/api/creator", {"channelId": "UC1"})] * (reads // 2):
+            sent = time.perf_counter()
+            response = await client.get(path, params=params)
+            latencies.append(time.perf_counter() - sent)
+            assert response.status_code == 200
+        # Time from the callback arriving to the last read, and whether the exchange was still running then
+        elapsed, pending = time.perf_counter() - started, not callback.done()
+        return await callback, latencies, elapsed, pending
+
+
+def test_requests_keep_their_latency_during_a_slow_token_exchange(server, google):
+    google.token_delay = 1.0
+    callback, latencies, elapsed, pending = asyncio.run(connect_while_reading(server, google, reads=20))
+
+    assert callback.status_code == 307
+    assert "oauth=success" in callback.headers["location"]
+    # Every read finished while the exchange was still sleeping on its worker thread
+    assert pending
+    assert elapsed < google.token_delay / 2
+    assert max(latencies) < 0.2
+
+
+def test_a_token_exchange_past_the_timeout_fails_with_504(server, google, monkeypatch):
+    monkeypatch.setattr(server, "GOOGLE_API_TIMEOUT", 0.2)
+    google.token_delay = 1.0
+    started = time.perf_counter()
+    callback, _, _, _ = asyncio.run(connect_while_reading(server, google, reads=4))
+
+    assert callback.status_code == 504
+    assert time.perf_counter() - started < google.token_delay
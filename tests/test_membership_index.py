@@ -0,0 +1,51 @@
+import asyncio
+
+from mongomock_motor import AsyncMongoMockClient
+
+from membership_index import ChannelMembershipIndex
+
+
+class OpenChangeStream:
+    """A change stream that stays open without delivering any change"""
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        await asyncio.Event().wait()
+
+
+async def build(streaming: bool) -> ChannelMembershipIndex:
+    creators = AsyncMongoMockClient()["amplify_test"].creators
+    await creators.insert_one({"channelKeys": ["UC1", "legacy1"]})
+    if streaming:
+        # mongomock has no change streams, so without this the index runs in its rebuild fallback
+        creators.watch = lambda *args, **kwargs: OpenChangeStream()
+    index = ChannelMembershipIndex(capacity=1000)
+    index.start(creators)
+    while not index.ready or index.streaming != streaming:
+        await asyncio.sleep(0.01)
+    await index.stop()
+    return index
+
+
+def test_without_a_change_stream_no_lookup_is_answered_negatively():
+    index = asyncio.run(build(streaming=False))
+    # Another worker may have registered this channel since the last rebuild,
+    # and the worker bus forwarding it is allowed to drop the message
+    assert index.might_contain("UCelsewhere")
+    assert index.might_contain("legacy1")
+
+
+def test_with_an_open_change_stream_misses_are_answered():
+    index = asyncio.run(build(streaming=True))
+    assert not index.might_contain("UCelsewhere")
+    assert index.might_contain("UC1")
+    index.add("UCelsewhere")
+    assert index.might_contain("UCelsewhere")
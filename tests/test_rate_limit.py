@@ -0,0 +1,118 @@
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+import rate_limit
+from rate_limit import AdmissionMiddleware, TokenBucketLimiter
+
+
+def test_buckets_allow_a_burst_then_refill_at_the_budgeted_rate(monkeypatch):
+    clock = SimpleNamespace(now=100.0)
+    monkeypatch.setattr(rate_limit, "time", SimpleNamespace(monotonic=lambda: clock.now))
+    limiter = TokenBucketLimiter()
+
+    assert [limiter.acquire("a", (2, 3)) for _ in range(3)] == [0, 0, 0]
+    assert limiter.acquire("a", (2, 3)) == 0.5
+    # Other keys have their own bucket
+    assert limiter.acquire("b", (2, 3)) == 0
+
+    clock.now += 0.5
+    assert limiter.acquire("a", (2, 3)) == 0
+    assert limiter.stats()["limited"] == 1
+
+
+def test_the_least_recently_used_buckets_are_dropped_past_max_keys():
+    limiter = TokenBucketLimiter(max_keys=2)
+    for key in ("a", "b", "a", "c"):
+        limiter.acquire(key, (1, 1))
+    assert limiter.stats()["buckets"] == 2
+    # "b" was the least recently used, so it comes back with a full bucket
+    assert limiter.acquire("b", (1, 1)) == 0
+    assert limiter.acquire("c", (1, 1)) > 0
+
+
+def admission_app(max_in_flight: int = 10):
+    release = asyncio.Event()
+
+    async def ok(request):
+        return JSONResponse({"ok": True})
+
+    async def slow(request):
+        await release.wait()
+        return JSONResponse({"ok": True})
+
+    routes = [Route("/limited", ok), Route("/open", ok), Route("/slow", slow), Route("/health", ok)]
+    app = AdmissionMiddleware(
+        Starlette(routes=routes),
+        routes_provider=lambda: routes,
+        limiter=TokenBucketLimiter(),
+        budgets={"/limited": (1, 2), "/slow": None},
+        default_budget=None,
+        max_in_flight=max_in_flight,
+        exempt_prefixes=("/health",)
+    )
+    return app, release
+
+
+def client_for(app, address: str) -> httpx.AsyncClient:
+    transport = httpx.ASGITransport(app=app, client=(address, 1234))
+    return httpx.AsyncClient(transport=transport, base_url="http://amplify.test")
+
+
+def test_budgets_apply_per_route_and_client_address():
+    app, _ = admission_app()
+
+    async def main():
+        async with client_for(app, "10.0.0.1") as first, client_for(app, "10.0.0.2") as second:
+            statuses = [(await first.get("/limited")).status_code for _ in range(3)]
+            rejected = await first.get("/limited")
+            return statuses, rejected, (await second.get("/limited")).status_code, (await first.get("/open")).status_code
+
+    statuses, rejected, other_client, unbudgeted = asyncio.run(main())
+    assert statuses == [200, 200, 429]
+    assert rejected.json() == {"detail": "Rate limit exceeded"}
+    assert rejected.headers["retry-after"] == "1"
+    assert (other_client, unbudgeted) == (200, 200)
+
+
+def test_requests_past_the_in_flight_cap_are_shed_except_exempt_routes():
+    app, release = admission_app(max_in_flight=1)
+
+    async def main():
+        async with client_for(app, "10.0.0.1") as client:
+            parked = asyncio.create_task(client.get("/slow"))
+            while not app.in_flight:
+                await asyncio.sleep(0.01)
+            shed, health = await client.get("/open"), await client.get("/health")
+            release.set()
+            return (await parked).status_code, shed, health.status_code, app.in_flight
+
+    parked, shed, health, in_flight = asyncio.run(main())
+    assert (parked, shed.status_code, health, in_flight) == (200, 503, 200, 0)
+    assert "retry-after" in shed.headers
+
+
+def test_tips_naming_a_wallet_do_not_spend_its_budget_for_other_clients(server, monkeypatch):
+    monkeypatch.setattr(server, "RATE_LIMITING", True)
+    monkeypatch.setattr(server, "rate_limiter", TokenBucketLimiter())
+    monkeypatch.setitem(server.RATE_LIMITS, "/api/tip", (0.001, 2))
+
+    def tip(signature: str, channel_id: str = "UC1") -> dict:
+        return {"fromWallet": "Victim", "toWallet": "Wallet1", "channelId": channel_id, "amount": 1.0, "signature": signature}
+
+    async def main():
+        async with client_for(server.app, "10.0.0.1") as attacker, client_for(server.app, "10.0.0.2") as victim:
+            await attacker.post("/api/register", json={"channelId": "UC1", "walletAddress": "Wallet1"})
+            # Rejected tips never reach the budget
+            bogus = [(await attacker.post("/api/tip", json=tip(f"bogus{i}", "UCnope"))).status_code for i in range(5)]
+            spent = [(await attacker.post("/api/tip", json=tip(f"a{i}"))).status_code for i in range(3)]
+            return bogus, spent, (await victim.post("/api/tip", json=tip("v1"))).status_code
+
+    bogus, spent, victim = asyncio.run(main())
+    assert bogus == [404] * 5
+    assert spent == [200, 200, 429]
+    assert victim == 200
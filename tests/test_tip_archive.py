@@ -0,0 +1,67 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import migrate
+import tip_archive
+
+
+def tip(signature: str, amount: float = 1.0) -> dict:
+    return {"fromWallet": "Tipper1", "toWallet": "Wallet1", "channelId": "UC1", "amount": amount, "signature": signature}
+
+
+@pytest.fixture
+def archived(api, server):
+    """Three tips recorded and then moved to the archive tier"""
+    api.post("/api/register", json={"channelId": "UC1", "walletAddress": "Wallet1"})
+    ids = {signature: api.post("/api/tip", json=tip(signature)).json()["id"] for signature in ("s1", "s2", "s3")}
+    result = api.portal.call(tip_archive.archive_tips, server.db, datetime.utcnow() + timedelta(minutes=1))
+    assert result["moved"] == 3
+    return ids
+
+
+def tier_counts(api, server) -> tuple:
+    return (
+        api.portal.call(server.db.tips.count_documents, {}),
+        api.portal.call(server.db.tips_archive.count_documents, {}),
+    )
+
+
+def test_replaying_an_archived_signature_returns_the_archived_tip(api, server, archived):
+    replay = api.post("/api/tip", json=tip("s1"))
+    assert replay.status_code == 200
+    assert replay.json()["id"] == archived["s1"]
+    assert tier_counts(api, server) == (0, 3)
+
+    assert api.post("/api/tip", json=tip("s1", amount=5.0)).status_code == 409
+    assert len(api.get("/api/tips/wallet/Wallet1").json()) == 3
+    assert api.get("/api/stats/UC1").json()["totalTips"] == 3
+
+
+def test_batch_replay_of_archived_signatures_is_reported_as_duplicates(api, server, archived):
+    result = api.post("/api/tips/batch", json={"tips": [tip("s2"), tip("s3"), tip("s4")]}).json()
+    assert (result["inserted"], result["duplicates"]) == (1, 2)
+    assert [entry["status"] for entry in result["results"]] == ["duplicate", "duplicate", "ok"]
+    assert result["results"][0]["id"] == archived["s2"]
+    assert tier_counts(api, server) == (1, 3)
+    assert api.get("/api/stats/UC1").json()["totalTips"] == 4
+
+
+def test_group_commit_replay_of_an_archived_signature(api, server, archived, monkeypatch):
+    monkeypatch.setattr(server, "TIP_GROUP_COMMIT", True)
+    monkeypatch.setattr(type(server.db.tips), "with_options", lambda collection, **options: collection, raising=False)
+    api.portal.call(server.tip_commit_queue.start)
+    try:
+        assert api.post("/api/tip", json=tip("s3")).json()["id"] == archived["s3"]
+    finally:
+        api.portal.call(server.tip_commit_queue.close)
+    assert tier_counts(api, server) == (0, 3)
+
+
+def test_dedupe_removes_hot_copies_of_archived_signatures(api, server, archived):
+    async def insert_replay():
+        await server.db.tips.insert_one({**tip("s1"), "id": "replayed", "timestamp": datetime.utcnow()})
+        await migrate.dedupe_tips(server.db, dry_run=False)
+
+    api.portal.call(insert_replay)
+    assert tier_counts(api, server) == (0, 3)
@@ -0,0 +1,18 @@
+def tip(signature: str, amount: float = 1.0) -> dict:
+    return {"fromWallet": "Tipper1", "toWallet": "Wallet1", "channelId": "UC1", "amount": amount, "signature": signature}
+
+
+def test_batch_reports_replays_with_a_different_payload_as_conflicts(api):
+    api.post("/api/register", json={"channelId": "UC1", "walletAddress": "Wallet1"})
+    first = api.post("/api/tip", json=tip("s1")).json()
+
+    result = api.post("/api/tips/batch", json={"tips": [
+        tip("s1"), tip("s1", amount=9.0), tip("s2"), tip("s2", amount=3.0), {"signature": "bad"},
+    ]}).json()
+
+    assert [entry["status"] for entry in result["results"]] == ["duplicate", "conflict", "ok", "conflict", "error"]
+    assert result["results"][1]["id"] == first["id"]
+    assert (result["inserted"], result["duplicates"], result["failed"]) == (1, 1, 3)
+    # The single-tip endpoint agrees
+    assert api.post("/api/tip", json=tip("s1", amount=9.0)).status_code == 409
+    assert api.get("/api/stats/UC1").json()["totalTips"] == 2
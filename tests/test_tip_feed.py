@@ -0,0 +1,64 @@
+import asyncio
+import gc
+import tracemalloc
+
+import pytest
+
+from tip_feed import FeedFullError, TipFeed
+
+EVENT = b'event: tip\nid: 00000000-0000-0000-0000-000000000000\ndata: {"amount":1.0}\n\n'
+
+# A scaled-down run of benchmarks/feed_memory.py, with the same limit
+SUBSCRIBERS = 2000
+MAX_KIB_PER_SUBSCRIBER = 4
+
+
+def test_idle_subscribers_parked_on_the_feed_stay_within_the_memory_bound():
+    async def main():
+        feed = TipFeed(max_subscribers=SUBSCRIBERS)
+        gc.collect()
+        tracemalloc.start()
+        try:
+            before = tracemalloc.get_traced_memory()[0]
+            subscriptions = [feed.subscribe(f"channel:UC{i % 100}") for i in range(SUBSCRIBERS)]
+            # Each parked the way an open SSE stream waits for its next event
+            waiters = [asyncio.create_task(sub.next_batch(3600)) for sub in subscriptions]
+            await asyncio.sleep(0)
+            gc.collect()
+            idle = tracemalloc.get_traced_memory()[0] - before
+        finally:
+            tracemalloc.stop()
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        return idle / SUBSCRIBERS
+
+    assert asyncio.run(main()) < MAX_KIB_PER_SUBSCRIBER * 1024
+
+
+def test_a_consumer_that_falls_a_full_buffer_behind_is_evicted_without_slowing_others():
+    async def main():
+        feed = TipFeed(max_buffer=5)
+        slow, fast = feed.subscribe("channel:UC1"), feed.subscribe("channel:UC1")
+        delivered = []
+        for _ in range(3):
+            for _ in range(4):
+                feed.publish(("channel:UC1",), EVENT)
+            delivered.extend(await fast.next_batch(1))
+        # The evicted consumer is woken at once rather than waiting out its timeout
+        return feed, slow, delivered, await asyncio.wait_for(slow.next_batch(3600), 1)
+
+    feed, slow, delivered, evicted_batch = asyncio.run(main())
+    assert slow.evicted
+    assert evicted_batch == []
+    assert len(delivered) == 12
+    assert (feed.stats()["subscribers"], feed.stats()["evictions"]) == (1, 1)
+
+
+def test_subscribers_past_the_cap_are_rejected():
+    feed = TipFeed(max_subscribers=2)
+    feed.subscribe("channel:UC1")
+    feed.subscribe("channel:UC2")
+    with pytest.raises(FeedFullError):
+        feed.subscribe("channel:UC3")
+    assert feed.stats()["rejected"] == 1
@@ -0,0 +1,105 @@
+import pytest
+
+import migrate
+import tip_stats
+
+
+def tip(signature: str, amount: float = 1.0, from_wallet: str = "Tipper1") -> dict:
+    return {"fromWallet": from_wallet, "toWallet": "Wallet1", "channelId": "UC1", "amount": amount, "signature": signature}
+
+
+def test_reconcile_reports_drift_without_writing_unless_asked(api, server):
+    api.post("/api/register", json={"channelId": "UC1", "walletAddress": "Wallet1"})
+    api.post("/api/tip", json=tip("s1"))
+    api.portal.call(server.db.channel_stats.update_one, {"_id": "UC1"}, {"$inc": {"totalTips": 5}})
+
+    # Reconciliation is an operator job, not a public route
+    assert api.post("/api/stats/reconcile").status_code in (404, 405)
+
+    report = api.portal.call(tip_stats.reconcile, server.db)
+    assert (report["channelsDrifted"], report["fixed"]) == (1, False)
+    assert api.get("/api/stats/UC1").json()["totalTips"] == 6
+
+    api.portal.call(lambda: tip_stats.reconcile(server.db, fix=True))
+    assert api.get("/api/stats/UC1").json()["totalTips"] == 1
+
+
+def test_unique_tippers_are_counted_once_per_bucket_without_growing_the_rollup(api, server):
+    api.post("/api/register", json={"channelId": "UC1", "walletAddress": "Wallet1"})
+    api.post("/api/tip", json=tip("s1", from_wallet="A"))
+    api.post("/api/tip", json=tip("s2", from_wallet="A"))
+    api.post("/api/tips/batch", json={"tips": [tip("s3", from_wallet="B"), tip("s4", from_wallet="A"), tip("s5", from_wallet="C")]})
+
+    [bucket] = [b for b in api.get("/api/stats/UC1/timeseries").json()["buckets"] if b["count"]]
+    assert (bucket["count"], bucket["sum"], bucket["uniqueTippers"]) == (5, 5.0, 3)
+
+    rollup = api.portal.call(server.db.tip_rollups.find_one, {"channelId": "UC1", "granularity": "day"})
+    assert "tippers" not in rollup
+    assert api.portal.call(server.db.tip_rollup_tippers.count_documents, {"_id.granularity": "day"}) == 3
+
+
+def test_migration_moves_tipper_arrays_without_double_counting(api, server):
+    api.post("/api/register", json={"channelId": "UC1", "walletAddress": "Wallet1"})
+    api.post("/api/tip", json=tip("s1", from_wallet="A"))
+
+    async def add_legacy_array():
+        # A bucket written before the upgrade, then a tip from "A" recorded since
+        await server.db.tip_rollups.update_many({}, {"$set": {"tippers": ["A", "B"]}})
+        await migrate.move_rollup_tippers(server.db)
+
+    api.portal.call(add_legacy_array)
+    for bucket in api.portal.call(lambda: server.db.tip_rollups.find({}).to_list(10)):
+        assert "tippers" not in bucket
+        assert bucket["uniqueTippers"] == 2
+
+
+def fail_once(monkeypatch):
+    apply_tips = tip_stats.apply_tips
+    calls = []
+
+    async def flaky(db, tips):
+        calls.append(len(tips))
+        if len(calls) == 1:
+            raise RuntimeError("stats write failed")
+        await apply_tips(db, tips)
+
+    monkeypatch.setattr(tip_stats, "apply_tips", flaky)
+
+
+def test_a_retry_counts_a_tip_whose_counters_failed_exactly_once(api, server, monkeypatch):
+    api.post("/api/register", json={"channelId": "UC1", "walletAddress": "Wallet1"})
+    fail_once(monkeypatch)
+    with pytest.raises(RuntimeError):
+        api.post("/api/tip", json=tip("s1"))
+    # The tip row was stored, so the retry is a replay
+    assert api.portal.call(server.db.tips.count_documents, {}) == 1
+
+    for _ in range(2):
+        assert api.post("/api/tip", json=tip("s1")).status_code == 200
+    assert api.get("/api/stats/UC1").json()["totalTips"] == 1
+
+    fail_once(monkeypatch)
+    with pytest.raises(RuntimeError):
+        api.post("/api/tips/batch", json={"tips": [tip("s2"), tip("s3")]})
+    retried = api.post("/api/tips/batch", json={"tips": [tip("s2"), tip("s3")]}).json()
+    assert retried["duplicates"] == 2
+    assert api.get("/api/stats/UC1").json()["totalTips"] == 3
+
+
+def test_leaderboard_rebuild_counts_hot_and_archived_tips_once(api, server):
+    api.post("/api/register", json={"channelId": "UC1", "walletAddress": "Wallet1"})
+    api.post("/api/tips/batch", json={"tips": [tip("s1", 2.0, "A"), tip("s2", 1.0, "B"), tip("s3", 1.0, "B")]})
+
+    async def rebuild():
+        # Tips recorded before the boards existed, one of them mid-archival
+        await server.db.leaderboards.delete_many({})
+        archived = await server.db.tips.find({"signature": {"$in": ["s1", "s2"]}}).to_list(None)
+        await server.db.tips_archive.insert_many(archived)
+        await server.db.tips.delete_many({"signature": "s1"})
+        await migrate.rebuild_leaderboards(server.db, batch_size=2)
+
+    api.portal.call(rebuild)
+    supporters = api.get("/api/leaderboard/supporters/UC1", params={"window": "all"}).json()
+    assert [(entry["id"], entry["totalAmount"], entry["totalTips"]) for entry in supporters["supporters"]] == [("A", 2.0, 1), ("B", 2.0, 2)]
+    indexes = api.portal.call(server.db.leaderboards.index_information)
+    assert any(info["key"] == [("board", 1), ("scope", 1), ("period", 1), ("amount", -1), ("member", 1)] for info in indexes.values())
@@ -0,0 +1,74 @@
+import asyncio
+import multiprocessing
+import queue
+
+from creator_cache import CreatorLookupCache
+from worker_bus import WorkerBus
+
+TIMEOUT = 10.0
+
+
+def run_peer(directory: str, inbox, outbox):
+    """A second worker: evicts from its own cache on "creator" messages and reports what it evicted"""
+
+    async def main():
+        cache = CreatorLookupCache()
+        cache.put(("walletAddress", "Wallet1"), {"walletAddress": "Wallet1"})
+        stopped = asyncio.Event()
+
+        def evict(data):
+            cache.invalidate(("walletAddress", data["wallet"]))
+            outbox.put(("evicted", data, cache.peek(("walletAddress", data["wallet"]), default="missing")))
+            stopped.set()
+
+        bus = WorkerBus(directory, handlers={"creator": evict}, peer_refresh=0.0)
+        bus.start()
+        outbox.put(("ready",))
+        # Then publish back to the first worker once it says it is listening
+        await asyncio.get_running_loop().run_in_executor(None, inbox.get)
+        bus.publish("creator", {"wallet": "Wallet2", "channels": ["UC2"]})
+        await asyncio.wait_for(stopped.wait(), TIMEOUT)
+        bus.stop()
+
+    asyncio.run(main())
+
+
+def test_creator_invalidations_reach_the_other_worker_process(tmp_path):
+    context = multiprocessing.get_context("spawn")
+    inbox, outbox = context.Queue(), context.Queue()
+    peer = context.Process(target=run_peer, args=(str(tmp_path), inbox, outbox))
+    peer.start()
+    try:
+        assert outbox.get(timeout=TIMEOUT) == ("ready",)
+
+        async def main():
+            cache = CreatorLookupCache()
+            cache.put(("walletAddress", "Wallet2"), {"walletAddress": "Wallet2"})
+            received = asyncio.Event()
+
+            def evict(data):
+                cache.invalidate(("walletAddress", data["wallet"]))
+                received.set()
+
+            bus = WorkerBus(str(tmp_path), handlers={"creator": evict}, peer_refresh=0.0)
+            bus.start()
+            try:
+                inbox.put("listening")
+                await asyncio.wait_for(received.wait(), TIMEOUT)
+                assert cache.peek(("walletAddress", "Wallet2"), default="missing") == "missing"
+
+                bus.publish("creator", {"wallet": "Wallet1", "channels": ["UC1"]})
+                assert bus.stats()["sent"] == 1
+            finally:
+                bus.stop()
+
+        asyncio.run(main())
+        kind, data, cached = outbox.get(timeout=TIMEOUT)
+        assert (kind, data, cached) == ("evicted", {"wallet": "Wallet1", "channels": ["UC1"]}, "missing")
+    except queue.Empty:
+        raise AssertionError("the peer worker did not answer in time")
+    finally:
+        peer.join(TIMEOUT)
+        if peer.is_alive():
+            peer.terminate()
+    assert peer.exitcode == 0